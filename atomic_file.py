@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+"""
+Atomic file writes: readers (the next run, node_exporter, a git commit)
+never see a half-written file.
+"""
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+# Read once: os.umask() can only be queried by setting it, which is not
+# thread-safe.
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+def file_mode(path):
+    # NamedTemporaryFile creates 0600 files; keep the mode of the file being
+    # replaced, or use the one open() would give a new file, so that other
+    # users (node_exporter, a web server) can still read it.
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        return 0o666 & ~UMASK
+
+@contextmanager
+def atomic_writer(path, mode='w', encoding='utf-8'):
+    """Write path through a temporary file in the same directory.
+
+    The file replaces path once the block completes; on error it is removed
+    and path is left untouched.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    file = tempfile.NamedTemporaryFile(mode, encoding=None if 'b' in mode else encoding, dir=directory, delete=False)
+    try:
+        with file:
+            yield file
+            os.chmod(file.name, file_mode(path))
+        os.replace(file.name, path)
+    except BaseException:
+        try:
+            os.remove(file.name)
+        except FileNotFoundError:
+            pass
+        raise
+
+def write_atomic(path, content):
+    with atomic_writer(path, 'wb' if isinstance(content, bytes) else 'w') as file:
+        file.write(content)
+
+def write_json(path, data, **kwargs):
+    with atomic_writer(path) as file:
+        json.dump(data, file, ensure_ascii=False, **kwargs)
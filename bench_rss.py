@@ -0,0 +1,280 @@
+#!/usr/bin/python3
+"""
+Offline end-to-end benchmark for the rss.py pipeline.
+
+Google News (feeds and article link resolution), Anthropic and Azure
+Translator are replaced by local HTTP stand-ins with configurable latency,
+and the real rss.main() runs against them in a scratch directory.
+
+Usage:
+  python bench_rss.py record            # save the live Google News feeds as fixtures
+  python bench_rss.py run [options]     # run the benchmark
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+FIXTURES_DIR = './bench_fixtures'
+FEED_FILES   = ['./cyberattacks_news.xml', './unlikely_cyberattacks_news.xml']
+ARCHIVE_DIR  = './archive'
+
+# Keys are only checked for presence by rss.py; the stand-ins accept anything.
+os.environ.setdefault('ATRANS_API_KEY', 'benchmark')
+os.environ.setdefault('ANTHROPIC_API_KEY', 'benchmark')
+
+def fixture_path(url):
+    return os.path.join(FIXTURES_DIR, hashlib.md5(url.encode('utf-8')).hexdigest() + '.xml')
+
+def feed_urls():
+    import rss
+    return rss.rss_feed_urls_en + rss.rss_feed_urls_others
+
+def record():
+    import requests
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    for url in feed_urls():
+        response = requests.get(url, timeout=30)
+        response.raise_for_status()
+        with open(fixture_path(url), 'wb') as file:
+            file.write(response.content)
+        print(f'Recorded {url}')
+
+_WORDS = ['ransomware', 'hospital', 'city', 'council', 'bank', 'airport', 'university', 'port',
+          'utility', 'retailer', 'insurer', 'school', 'district', 'ministry', 'telecom', 'clinic']
+
+def synthetic_feed(url, items):
+    # Used when no recorded fixture exists. A third of the titles are shared
+    # between locales, like syndicated headlines.
+    rng   = random.Random(url)
+    now   = datetime.now(timezone.utc)
+    parts = []
+    for index in range(items):
+        if index % 3 == 0:
+            title = f'Cyber attack on {random.Random(index).choice(_WORDS)} number {index}'
+        else:
+            title = f'{" ".join(rng.choice(_WORDS) for _ in range(6))} {rng.randrange(10**6)}'
+        link = f'https://news.google.com/rss/articles/BENCH{rng.randrange(10**12)}?oc=5'
+        date = format_datetime(now - timedelta(minutes=rng.randrange(720)))
+        parts.append(f'<item><title>{escape(title)} - Source {index % 17}</title><link>{link}</link>'
+                     f'<guid isPermaLink="false">{link}</guid><pubDate>{date}</pubDate>'
+                     f'<source url="https://example.com">Source {index % 17}</source></item>')
+    return ('<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>Google News</title>'
+            + ''.join(parts) + '</channel></rss>').encode('utf-8')
+
+class StandIns:
+    """Local Google News, Anthropic messages and Translator endpoints."""
+
+    def __init__(self, feeds, anthropic_latency, translator_latency):
+        self.feeds = feeds
+        stand_ins  = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, body, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.startswith('/rss/articles/'):
+                    article = self.path[len('/rss/articles/'):]
+                    self.reply(f'<c-wiz><div jscontroller="aLI87" data-n-a-sg="sig-{article}" '
+                               f'data-n-a-ts="1700000000"></div></c-wiz>'.encode('utf-8'), 'text/html')
+                else:
+                    self.reply(stand_ins.feeds[self.path], 'application/xml')
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                if self.path.startswith('/_/DotsSplashUi/data/batchexecute'):
+                    self.reply(stand_ins.batchexecute(body).encode('utf-8'), 'application/json')
+                    return
+                request = json.loads(body)
+                if self.path.startswith('/v1/messages'):
+                    time.sleep(anthropic_latency)
+                    self.reply(json.dumps(stand_ins.message(request)).encode('utf-8'), 'application/json')
+                else:
+                    time.sleep(translator_latency)
+                    body = [{'detectedLanguage': {'language': 'fr', 'score': 1.0},
+                             'translations': [{'text': f'[en] {item["text"]}', 'to': 'en'}]} for item in request]
+                    self.reply(json.dumps(body).encode('utf-8'), 'application/json')
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url    = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @staticmethod
+    def verdict(title):
+        value = int(hashlib.md5(title.encode('utf-8')).hexdigest(), 16) % 10
+        return 'likely' if value < 3 else 'unlikely' if value < 6 else 'no'
+
+    def message(self, request):
+        content = request['messages'][0]['content']
+        if 'JSON' in request.get('system', ''):
+            lines = [line.split('. ', 1) for line in content.split('\n')]
+            text  = json.dumps([{'index': int(index), 'verdict': self.verdict(title)} for index, title in lines])
+        else:
+            text  = self.verdict(content)
+        return {'id': 'msg_benchmark', 'type': 'message', 'role': 'assistant', 'model': request['model'],
+                'content': [{'type': 'text', 'text': text}], 'stop_reason': 'end_turn', 'stop_sequence': None,
+                'usage': {'input_tokens': len(content) // 4 + 100, 'output_tokens': len(text) // 4 + 1}}
+
+    @staticmethod
+    def batchexecute(body):
+        envelopes = json.loads(parse_qs(body.decode('utf-8'))['f.req'][0])[0]
+        results   = []
+        for rpc, payload, _, index in envelopes:
+            article = json.loads(payload)[2]
+            url     = f'https://publisher{int(hashlib.md5(article.encode()).hexdigest(), 16) % 50}.example/{article}'
+            results.append(['wrb.fr', rpc, json.dumps(['garturlres', url, 1]), None, None, None, index])
+        return ")]}'\n\n" + json.dumps(results + [['di', 42], ['af.httprm', 41, '0', 7]])
+
+    def close(self):
+        self.server.shutdown()
+
+def percentile(values, fraction):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+def run_pipeline(queue, directory, stand_ins_url, feed_map, claude_rpm, azure_rpm):
+    os.chdir(directory)
+    os.environ['ANTHROPIC_BASE_URL'] = stand_ins_url
+    import feed_writer
+    import rss
+    from rate_limit import per_minute
+
+    rss.TRANSLATOR_ENDPOINT = stand_ins_url
+    rss.GOOGLE_NEWS_URL     = stand_ins_url
+    rss.claude_limiter      = per_minute(claude_rpm, burst=10)
+    rss.azure_limiter       = per_minute(azure_rpm, burst=10)
+    rss.google_limiter      = per_minute(6000, burst=10)
+
+    # Point every feed at the stand-in, keeping the original query strings.
+    local = {url: stand_ins_url + url[len('https://news.google.com'):] for url in feed_map}
+    rss.rss_feed_urls_en     = [local[url] for url in rss.rss_feed_urls_en]
+    rss.rss_feed_urls_others = [local[url] for url in rss.rss_feed_urls_others]
+
+    # Per-item latency: from the end of the fetch of its feed to the moment
+    # the item is serialized for the output feed.
+    fetched    = []
+    emitted_at = {}
+    fetch_feed = rss.fetch_feed
+    def timed_fetch_feed(url, *args, **kwargs):
+        entries = fetch_feed(url, *args, **kwargs)
+        now = time.perf_counter()
+        fetched.extend((entry, now) for entry in entries or [])
+        return entries
+    rss.fetch_feed = timed_fetch_feed
+
+    format_item = feed_writer.format_item
+    def timed_format_item(title, link, date):
+        emitted_at[link] = time.perf_counter()
+        return format_item(title, link, date)
+    feed_writer.format_item = timed_format_item
+
+    start = time.perf_counter()
+    rss.main([])
+    elapsed = time.perf_counter() - start
+
+    # Items are published under their resolved link when there is one.
+    fetched_at = {}
+    for entry, fetch_time in fetched:
+        fetched_at.setdefault(entry.get('canonical_link', entry.link), fetch_time)
+    latencies = [emitted_at[link] - fetched_at[link] for link in emitted_at if link in fetched_at]
+    queue.put({
+        'seconds': elapsed,
+        'items': len(emitted_at),
+        'latencies': latencies,
+        'peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        'report': rss.report.as_dict(),
+    })
+
+def run(args):
+    urls = feed_urls()
+    feed_map = {}
+    recorded = 0
+    for url in urls:
+        if os.path.exists(fixture_path(url)):
+            with open(fixture_path(url), 'rb') as file:
+                feed_map[url] = file.read()
+            recorded += 1
+        else:
+            feed_map[url] = synthetic_feed(url, args.items)
+    print(f'{len(urls)} feeds: {recorded} recorded fixtures, {len(urls) - recorded} synthetic')
+
+    stand_ins = StandIns({}, args.anthropic_latency, args.translator_latency)
+    stand_ins.feeds = {urlsplit(url).path + '?' + urlsplit(url).query: body for url, body in feed_map.items()}
+
+    results = []
+    try:
+        for iteration in range(args.runs):
+            with tempfile.TemporaryDirectory() as directory:
+                for path in FEED_FILES:
+                    if os.path.exists(path):
+                        shutil.copy(path, directory)
+                if os.path.isdir(ARCHIVE_DIR):
+                    shutil.copytree(ARCHIVE_DIR, os.path.join(directory, 'archive'))
+                context = multiprocessing.get_context('fork')
+                queue   = context.Queue()
+                process = context.Process(target=run_pipeline, args=(queue, directory, stand_ins.url, feed_map,
+                                                                             args.claude_rpm, args.azure_rpm))
+                process.start()
+                result  = queue.get()
+                process.join()
+                results.append(result)
+    finally:
+        stand_ins.close()
+
+    print(f'{"run":>4} {"items":>6} {"seconds":>8} {"items/s":>8} {"p50 (s)":>8} {"p99 (s)":>8} {"peak RSS (MB)":>14}')
+    for iteration, result in enumerate(results, 1):
+        rate = result['items'] / result['seconds'] if result['seconds'] else 0
+        print(f'{iteration:>4} {result["items"]:>6} {result["seconds"]:>8.2f} {rate:>8.1f} '
+              f'{percentile(result["latencies"], 0.5):>8.3f} {percentile(result["latencies"], 0.99):>8.3f} '
+              f'{result["peak_rss"] / 1e6:>14.1f}')
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump([{key: value for key, value in result.items() if key != 'latencies'} for result in results],
+                      file, ensure_ascii=False, indent=4)
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline end-to-end benchmark for rss.py.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('record', help='Record the live Google News feeds as fixtures.')
+    run_parser = subparsers.add_parser('run', help='Run the benchmark against local stand-ins.')
+    run_parser.add_argument('--runs', type=int, default=1, help='Number of runs.')
+    run_parser.add_argument('--items', type=int, default=100, help='Items per synthetic feed.')
+    run_parser.add_argument('--anthropic-latency', type=float, default=0.5, help='Seconds per Anthropic request.')
+    run_parser.add_argument('--translator-latency', type=float, default=0.2, help='Seconds per Translator request.')
+    run_parser.add_argument('--claude-rpm', type=int, default=50, help='Anthropic requests per minute allowed.')
+    run_parser.add_argument('--azure-rpm', type=int, default=300, help='Translator requests per minute allowed.')
+    run_parser.add_argument('--output', help='Write the results (with the run reports) to this JSON file.')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record()
+    else:
+        run(args)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
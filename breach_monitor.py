@@ -2,8 +2,16 @@
 """
 Unified Breach Notification Monitor
 Supports multiple states through pluggable state-specific modules.
-Usage: python breach_monitor.py <state>
-Where <state> is: maine, washington, vermont
+Usage: python breach_monitor.py [<state>] [--workers N] [--backfill | --from YYYY-MM-DD [--to YYYY-MM-DD]]
+Where <state> is: maine, washington, vermont, newhampshire, idaho, california, iowa
+
+Without a state, all states are processed, up to --workers of them at a
+time. Requests to the same host are spaced out by a shared per-host limit.
+
+The daily run processes yesterday's notifications. Each state's watermark
+(the last day fully processed) is kept in breach_watermarks.json; after a
+failed or skipped run, --backfill processes every unseen notification since
+the watermark, and --from/--to an explicit date range.
 """
 
 import requests
@@ -11,19 +19,57 @@ import json
 import sys
 import os
 import argparse
+import glob
 import logging
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 from urllib.parse import urljoin
 
+import extract_pdf
+from breach_watermarks import Watermarks
+from rate_limit import per_host_per_minute
+from states.dates import date_range, describe, yesterday
+from url_index import cyberattacks_index
+
+# Name of the state being processed by the current thread, added to every log line
+state_context = threading.local()
+
+class StateLogFilter(logging.Filter):
+    def filter(self, record):
+        record.state = getattr(state_context, 'name', '-')
+        return True
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(levelname)s - [%(state)s] %(message)s'
 )
+for handler in logging.getLogger().handlers:
+    handler.addFilter(StateLogFilter())
 logger = logging.getLogger(__name__)
 
 # Constants
 CYBERATTACKS_JSON_FILE = "cyberattacks.json"
+WATERMARKS_FILE = "breach_watermarks.json"
+# Days looked back by --backfill for a state without a watermark
+BACKFILL_DAYS = 14
+STATES = ['maine', 'washington', 'vermont', 'newhampshire', 'idaho', 'california', 'iowa']
+# States processed at the same time; 1 processes them one after the other
+WORKERS = int(os.environ.get('BREACH_WORKERS', '4'))
+# New breaches of one state enriched at the same time; the downloads, PDF
+# parses and LLM calls they make are further limited in extract_pdf.py
+ENRICH_WORKERS = int(os.environ.get('BREACH_ENRICH_WORKERS', '4'))
+# Requests per minute to any single host (state portals and their PDFs), and
+# how many of them may go out back to back
+HOST_RPM = int(os.environ.get('BREACH_HOST_RPM', '120'))
+HOST_BURST = int(os.environ.get('BREACH_HOST_BURST', '4'))
+
+host_limiter = per_host_per_minute(HOST_RPM, HOST_BURST)
+extract_pdf.limiter = host_limiter
+# Workers share the notification files and the Telegram chat
+output_lock = threading.Lock()
 
 def fetch_webpage(url):
     """Fetch webpage content"""
@@ -31,7 +77,9 @@ def fetch_webpage(url):
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        response = requests.get(url, headers=headers, timeout=30)
+        host_limiter.acquire(url)
+        with extract_pdf.http_slots:
+            response = requests.get(url, headers=headers, timeout=30)
         response.raise_for_status()
         return response.text
     except requests.RequestException as e:
@@ -50,8 +98,11 @@ def load_cyberattacks_json():
         return []
     
     try:
+        logger.info(f"Loading existing {CYBERATTACKS_JSON_FILE} data")
         with open(CYBERATTACKS_JSON_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            cyberattacks_data = json.load(f)
+        logger.info(f"Loaded {len(cyberattacks_data)} existing cyberattack records")
+        return cyberattacks_data
     except json.JSONDecodeError as e:
         logger.critical(f"CRITICAL: {CYBERATTACKS_JSON_FILE} is corrupt and cannot be parsed: {e}")
         raise
@@ -59,22 +110,39 @@ def load_cyberattacks_json():
         logger.critical(f"CRITICAL: Cannot read {CYBERATTACKS_JSON_FILE}: {e}")
         raise
 
-def check_existing_urls(cyberattacks_data, notification_url):
-    """Check if notification URL already exists in cyberattacks.json"""
-    if not cyberattacks_data:
-        return False
-        
-    for attack in cyberattacks_data:
-        if isinstance(attack, dict) and 'url' in attack:
-            if attack['url'] == notification_url:
-                return True
-    return False
+def load_saved_notifications():
+    """Load the notifications saved by earlier runs and not yet merged into cyberattacks.json"""
+    notifications = []
+    for filename in sorted(glob.glob('new_notification_*.json')):
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Error reading {filename}, its URLs are not treated as known: {e}")
+            continue
+        if isinstance(saved, list):
+            notifications.extend(saved)
+    return notifications
+
+def load_known_urls():
+    """Index of the URLs in cyberattacks.json and in the saved notifications,
+    loaded once and shared by all states"""
+    return cyberattacks_index(CYBERATTACKS_JSON_FILE,
+                              lambda path: load_cyberattacks_json() + load_saved_notifications())
+
+def check_existing_urls(known_urls, notification_url):
+    """Check if notification URL already exists in cyberattacks.json or a saved notification (as url or pdf_url)"""
+    return notification_url in known_urls
 
 def save_notification_to_file(notifications, state_name, filename=None):
     """Save one or more notifications to JSON file, appending to existing data.
     
     Accepts a single dict or a list of dicts.
     """
+    with output_lock:
+        return _save_notification_to_file(notifications, state_name, filename)
+
+def _save_notification_to_file(notifications, state_name, filename=None):
     try:
         # Normalize to list
         if isinstance(notifications, dict):
@@ -112,6 +180,12 @@ def save_notification_to_file(notifications, state_name, filename=None):
 
 def send_telegram_notification(new_notifications, state_name, telegram_prefix):
     """Send Telegram notification with JSON data about new breach notifications"""
+    # The message and its JSON document are sent together, so the alerts of
+    # different states never interleave in the chat.
+    with output_lock:
+        return _send_telegram_notification(new_notifications, state_name, telegram_prefix)
+
+def _send_telegram_notification(new_notifications, state_name, telegram_prefix):
     try:
         bot_token = os.environ.get('TG_TK')
         chat_id = os.environ.get('TG_CHAT_ID')
@@ -203,8 +277,62 @@ def load_state_config(state_name):
         logger.error(f"Error importing state configuration for {state_name}: {e}")
         return None
 
-def process_state(state_name):
-    """Process breach notifications for a single state"""
+def state_result(state_name, success, new_breaches=0, notifications=0, failed=0):
+    return {'state': state_name, 'success': success, 'new_breaches': new_breaches, 'notifications': notifications,
+            'failed': failed}
+
+def state_window(state_name, watermarks, args):
+    """Return the (start_date, end_date, backfill) window to process for a state"""
+    if args.start_date:
+        return args.start_date, args.end_date or yesterday(), True
+    if args.backfill:
+        watermark = watermarks.get(state_name)
+        if watermark:
+            return watermark + timedelta(days=1), yesterday(), True
+        return yesterday() - timedelta(days=BACKFILL_DAYS - 1), yesterday(), True
+    return yesterday(), yesterday(), False
+
+def run_state(state_name, watermarks, start_date, end_date, backfill=False):
+    """Process one state in the current worker thread and time it.
+
+    Returns the state's result; failures are reported rather than raised.
+    The state's watermark is advanced once it was processed successfully.
+    """
+    state_context.name = state_name
+    started = time.monotonic()
+    watermark = watermarks.get(state_name)
+    if not backfill and watermark and start_date > watermark + timedelta(days=1):
+        logger.warning(f"Notifications after {watermark} and before {start_date} were never processed - "
+                       f"run with --backfill to catch up")
+    if start_date > end_date:
+        logger.info(f"{state_name} is up to date (watermark {watermark})")
+        result = state_result(state_name, True)
+    else:
+        try:
+            result = process_state(state_name, start_date, end_date, backfill)
+        except Exception as e:
+            logger.error(f"Error processing {state_name}: {e}", exc_info=True)
+            result = state_result(state_name, False)
+        if result['success'] and result['failed']:
+            # The breaches that raised are retried by the next backfill.
+            logger.warning(f"Watermark of {state_name} kept at {watermark}: {result['failed']} breach(es) failed")
+        elif result['success']:
+            if watermarks.advance(state_name, start_date, end_date):
+                logger.info(f"Watermark of {state_name} moved to {end_date}")
+        else:
+            logger.error(f"Failed to process {state_name}")
+    result['window'] = describe(start_date, end_date) if start_date <= end_date else '-'
+    result['seconds'] = time.monotonic() - started
+    state_context.name = '-'
+    return result
+
+def process_state(state_name, start_date=None, end_date=None, backfill=False):
+    """Process breach notifications for a single state
+    
+    Notifications dated from start_date to end_date are processed, yesterday's
+    by default. A backfill skips the already known ones instead of stopping
+    at the first of them.
+    """
     logger.info(f"{'='*60}")
     logger.info(f"PROCESSING STATE: {state_name.upper()}")
     logger.info(f"{'='*60}")
@@ -213,49 +341,105 @@ def process_state(state_name):
     state_config = load_state_config(state_name)
     if not state_config:
         logger.error(f"Failed to load state configuration for {state_name}")
-        return False
+        return state_result(state_name, False)
     
     logger.info(f"Starting {state_config.STATE_NAME} breach notification monitor")
     
     # Handle different state data sources
     if state_name.lower() == 'vermont':
-        return process_vermont_rss(state_config)
+        return process_vermont_rss(state_config, state_name, start_date, end_date, backfill)
     elif state_name.lower() == 'newhampshire':
-        return process_newhampshire_json(state_config)
+        return process_newhampshire_json(state_config, state_name, start_date, end_date, backfill)
     else:
-        return process_html_table_state(state_config, state_name)
+        return process_html_table_state(state_config, state_name, start_date, end_date, backfill)
 
-def process_vermont_rss(state_config):
+def enrich_breach(state_config, state_name, title, item):
+    """Run the state's process_breach() on one new breach, in a worker thread
+    
+    Returns (extracted_data, failed); failed is True when a page fetch, PDF
+    download or LLM call failed (extract_pdf.TransientError) or when
+    process_breach() raised, so that the state's watermark stays behind.
+    """
+    state_context.name = state_name
+    try:
+        extracted_data = state_config.process_breach(item, fetch_webpage)
+        if extracted_data:
+            logger.info(f"Successfully processed new breach: {title}")
+        else:
+            logger.info(f"No data extracted for {title} (likely filtered out)")
+        return extracted_data, False
+    except extract_pdf.TransientError as e:
+        logger.warning(f"Failed to process breach '{title}', it will be retried: {e}")
+        return None, True
+    except Exception as e:
+        logger.error(f"Error processing breach '{title}': {e}", exc_info=True)
+        return None, True
+
+def process_new_breaches(state_config, state_name, new_breaches):
+    """Enrich the new breaches of a state, then save and send the notifications.
+    
+    new_breaches holds (title, item) pairs in page order; the notifications
+    keep that order whatever order the enrichments finish in.
+    """
+    workers = max(1, min(ENRICH_WORKERS, len(new_breaches)))
+    logger.info(f"Processing {len(new_breaches)} new breaches with {workers} workers")
+    enrich = lambda breach: enrich_breach(state_config, state_name, *breach)
+    if workers == 1:
+        results = [enrich(breach) for breach in new_breaches]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'{state_name}-breach') as executor:
+            results = list(executor.map(enrich, new_breaches))
+    new_notifications = [extracted_data for extracted_data, failed in results if extracted_data]
+    failed = sum(1 for extracted_data, failed in results if failed)
+    
+    # Save and send notifications if there are new ones
+    if new_notifications:
+        logger.info(f"Saving {len(new_notifications)} new notifications locally")
+        save_notification_to_file(new_notifications, state_config.STATE_NAME)
+        known_urls = load_known_urls()
+        for notification in new_notifications:
+            known_urls.add(notification)
+        
+        logger.info("Sending Telegram notification")
+        telegram_prefix = state_config.get_telegram_message_prefix()
+        if send_telegram_notification(new_notifications, state_config.STATE_NAME, telegram_prefix):
+            logger.info(f"Processing complete. All {len(new_notifications)} notifications have been sent via Telegram")
+        else:
+            logger.warning("Telegram notification failed, but notifications were saved locally")
+    else:
+        logger.info("No new notifications found")
+    
+    logger.info(f"{state_config.STATE_NAME} processing complete. Found {len(new_breaches)} new breaches, {len(new_notifications)} sent via Telegram")
+    return state_result(state_name, True, len(new_breaches), len(new_notifications), failed)
+
+def process_vermont_rss(state_config, state_name, start_date=None, end_date=None, backfill=False):
     """Process Vermont's RSS feed"""
     # Fetch RSS feed
     logger.info(f"Fetching {state_config.STATE_NAME} RSS feed")
     rss_content = fetch_webpage(state_config.RSS_URL)
     if not rss_content:
         logger.error("Failed to fetch RSS feed")
-        return False
+        return state_result(state_name, False)
     
     # Parse RSS feed using state-specific parser
     logger.info("Parsing RSS feed")
-    rss_items = state_config.parse_rss_feed(rss_content)
+    rss_items = state_config.parse_rss_feed(rss_content, start_date, end_date)
     
     if rss_items is None:
         logger.error("Failed to parse RSS feed - check feed structure")
-        return False
+        return state_result(state_name, False)
     
     logger.info(f"Found {len(rss_items)} RSS items")
     
     if not rss_items:
-        logger.info("No RSS items found matching filter criteria - this is normal if no new breaches were posted yesterday")
-        return True
+        logger.info("No RSS items found matching filter criteria - this is normal if no new breaches were posted in the date window")
+        return state_result(state_name, True)
     
-    # Load existing cyberattacks data
-    logger.info("Loading existing cyberattacks.json data")
-    cyberattacks_data = load_cyberattacks_json()
-    logger.info(f"Loaded {len(cyberattacks_data)} existing cyberattack records")
+    # Existing cyberattacks data
+    known_urls = load_known_urls()
     
-    # Process each RSS item
-    new_breaches = 0
-    new_notifications = []
+    # Collect the new RSS items
+    new_breaches = []
     
     for item in rss_items:
         title = item['title']
@@ -265,74 +449,47 @@ def process_vermont_rss(state_config):
         logger.info(f"Checking RSS item: {title} ({pubdate})")
         
         # Check if notification URL already exists
-        if check_existing_urls(cyberattacks_data, link):
+        if check_existing_urls(known_urls, link):
             logger.info(f"Notification URL '{link}' already exists in cyberattacks.json")
+            if backfill:
+                continue
             logger.info("Found already processed notification - stopping processing (assuming chronological order)")
             break
         
         # New breach found
         logger.info(f"New breach found: {title}")
-        new_breaches += 1
-        
-        logger.info(f"Processing link: {link}")
-        try:
-            extracted_data = state_config.process_breach(item, fetch_webpage)
-            if extracted_data:
-                logger.info(f"Successfully processed new breach: {title}")
-                new_notifications.append(extracted_data)
-            else:
-                logger.info(f"No data extracted for {title} (likely filtered out or error)")
-        except Exception as e:
-            logger.error(f"Error processing breach '{title}': {e}", exc_info=True)
-    
-    # Save and send notifications if there are new ones
-    if new_notifications:
-        logger.info(f"Saving {len(new_notifications)} new notifications locally")
-        save_notification_to_file(new_notifications, state_config.STATE_NAME)
-        
-        logger.info("Sending Telegram notification")
-        telegram_prefix = state_config.get_telegram_message_prefix()
-        if send_telegram_notification(new_notifications, state_config.STATE_NAME, telegram_prefix):
-            logger.info(f"Processing complete. All {len(new_notifications)} notifications have been sent via Telegram")
-        else:
-            logger.warning("Telegram notification failed, but notifications were saved locally")
-    else:
-        logger.info("No new notifications found")
+        new_breaches.append((title, item))
     
-    logger.info(f"{state_config.STATE_NAME} processing complete. Found {new_breaches} new breaches, {len(new_notifications)} sent via Telegram")
-    return True
+    return process_new_breaches(state_config, state_name, new_breaches)
 
-def process_newhampshire_json(state_config):
+def process_newhampshire_json(state_config, state_name, start_date=None, end_date=None, backfill=False):
     """Process New Hampshire's JSON API"""
     # Fetch JSON API
     logger.info(f"Fetching {state_config.STATE_NAME} JSON API")
     json_content = state_config.fetch_json_api()
     if not json_content:
         logger.error("Failed to fetch JSON API")
-        return False
+        return state_result(state_name, False)
     
     # Parse JSON API using state-specific parser
     logger.info("Parsing JSON API response")
-    json_items = state_config.parse_json_api(json_content)
+    json_items = state_config.parse_json_api(json_content, start_date, end_date)
     
     if json_items is None:
         logger.error("Failed to parse JSON API response - check API structure")
-        return False
+        return state_result(state_name, False)
     
     logger.info(f"Found {len(json_items)} JSON items")
     
     if not json_items:
-        logger.info("No JSON items found matching filter criteria - this is normal if no new breaches were posted yesterday")
-        return True
+        logger.info("No JSON items found matching filter criteria - this is normal if no new breaches were posted in the date window")
+        return state_result(state_name, True)
     
-    # Load existing cyberattacks data
-    logger.info("Loading existing cyberattacks.json data")
-    cyberattacks_data = load_cyberattacks_json()
-    logger.info(f"Loaded {len(cyberattacks_data)} existing cyberattack records")
+    # Existing cyberattacks data
+    known_urls = load_known_urls()
     
-    # Process each JSON item
-    new_breaches = 0
-    new_notifications = []
+    # Collect the new JSON items
+    new_breaches = []
     
     for item in json_items:
         title = item['title']
@@ -342,80 +499,56 @@ def process_newhampshire_json(state_config):
         logger.info(f"Checking JSON item: {title} ({date})")
         
         # Check if notification URL already exists
-        if check_existing_urls(cyberattacks_data, pdf_url):
+        if check_existing_urls(known_urls, pdf_url):
             logger.info(f"Notification URL '{pdf_url}' already exists in cyberattacks.json")
+            if backfill:
+                continue
             logger.info("Found already processed notification - stopping processing (assuming chronological order)")
             break
         
         # New breach found
         logger.info(f"New breach found: {title}")
-        new_breaches += 1
-        
-        logger.info(f"Processing PDF: {pdf_url}")
-        try:
-            extracted_data = state_config.process_breach(item, fetch_webpage)
-            if extracted_data:
-                logger.info(f"Successfully processed new breach: {title}")
-                new_notifications.append(extracted_data)
-            else:
-                logger.info(f"No data extracted for {title} (likely filtered out or error)")
-        except Exception as e:
-            logger.error(f"Error processing breach '{title}': {e}", exc_info=True)
-    
-    # Save and send notifications if there are new ones
-    if new_notifications:
-        logger.info(f"Saving {len(new_notifications)} new notifications locally")
-        save_notification_to_file(new_notifications, state_config.STATE_NAME)
-        
-        logger.info("Sending Telegram notification")
-        telegram_prefix = state_config.get_telegram_message_prefix()
-        if send_telegram_notification(new_notifications, state_config.STATE_NAME, telegram_prefix):
-            logger.info(f"Processing complete. All {len(new_notifications)} notifications have been sent via Telegram")
-        else:
-            logger.warning("Telegram notification failed, but notifications were saved locally")
-    else:
-        logger.info("No new notifications found")
+        new_breaches.append((title, item))
     
-    logger.info(f"{state_config.STATE_NAME} processing complete. Found {new_breaches} new breaches, {len(new_notifications)} sent via Telegram")
-    return True
+    return process_new_breaches(state_config, state_name, new_breaches)
 
-def process_html_table_state(state_config, state_name):
+def process_html_table_state(state_config, state_name, start_date=None, end_date=None, backfill=False):
     """Process states that use HTML table parsing (Maine, Washington, Idaho, California, Iowa)"""
-    # Fetch webpage - handle Iowa's dynamic URL
+    # Fetch webpage - Iowa has one page per year, newest first
     if state_name.lower() == 'iowa':
-        url = state_config.get_current_year_url()
-        logger.info(f"Fetching {state_config.STATE_NAME} breach notification page (year-specific): {url}")
+        first_date, last_date = date_range(start_date, end_date)
+        urls = [state_config.get_year_url(year) for year in range(last_date.year, first_date.year - 1, -1)]
     else:
-        url = state_config.URL
-        logger.info(f"Fetching {state_config.STATE_NAME} breach notification page")
+        urls = [state_config.URL]
     
-    html_content = fetch_webpage(url)
-    if not html_content:
-        logger.error("Failed to fetch webpage")
-        return False
-    
-    # Parse breach table using state-specific parser
-    logger.info("Parsing breach notification table")
-    breaches = state_config.parse_breach_table(html_content)
-    
-    if breaches is None:
-        logger.error("Failed to parse breach table - check page structure")
-        return False
+    breaches = []
+    for url in urls:
+        logger.info(f"Fetching {state_config.STATE_NAME} breach notification page: {url}")
+        html_content = fetch_webpage(url)
+        if not html_content:
+            logger.error("Failed to fetch webpage")
+            return state_result(state_name, False)
+        
+        # Parse breach table using state-specific parser
+        logger.info("Parsing breach notification table")
+        page_breaches = state_config.parse_breach_table(html_content, start_date, end_date)
+        
+        if page_breaches is None:
+            logger.error("Failed to parse breach table - check page structure")
+            return state_result(state_name, False)
+        breaches.extend(page_breaches)
     
     logger.info(f"Found {len(breaches)} breach notifications")
     
     if not breaches:
-        logger.info("No breaches found matching filter criteria - this is normal if no new breaches were posted yesterday")
-        return True
+        logger.info("No breaches found matching filter criteria - this is normal if no new breaches were posted in the date window")
+        return state_result(state_name, True)
     
-    # Load existing cyberattacks data
-    logger.info("Loading existing cyberattacks.json data")
-    cyberattacks_data = load_cyberattacks_json()
-    logger.info(f"Loaded {len(cyberattacks_data)} existing cyberattack records")
+    # Existing cyberattacks data
+    known_urls = load_known_urls()
     
-    # Process each breach
-    new_breaches = 0
-    new_notifications = []
+    # Collect the new breaches
+    new_breaches = []
     
     for breach in breaches:
         org_name = breach['organization']
@@ -435,76 +568,70 @@ def process_html_table_state(state_config, state_name):
             full_url = link
         
         # Check if notification URL already exists
-        if check_existing_urls(cyberattacks_data, full_url):
+        if check_existing_urls(known_urls, full_url):
             logger.info(f"Notification URL '{full_url}' already exists in cyberattacks.json")
+            if backfill:
+                continue
             logger.info("Found already processed notification - stopping processing (assuming chronological order)")
             break
         
         # New breach found
         logger.info(f"New breach found: {org_name}")
-        new_breaches += 1
-        
-        logger.info(f"Processing link: {full_url}")
-        try:
-            extracted_data = state_config.process_breach(full_url, fetch_webpage)
-            if extracted_data:
-                logger.info(f"Successfully processed new breach: {org_name}")
-                new_notifications.append(extracted_data)
-            else:
-                logger.info(f"No data extracted for {org_name} (likely filtered out or error)")
-        except Exception as e:
-            logger.error(f"Error processing breach '{org_name}': {e}", exc_info=True)
-    
-    # Save and send notifications if there are new ones
-    if new_notifications:
-        logger.info(f"Saving {len(new_notifications)} new notifications locally")
-        save_notification_to_file(new_notifications, state_config.STATE_NAME)
-        
-        logger.info("Sending Telegram notification")
-        telegram_prefix = state_config.get_telegram_message_prefix()
-        if send_telegram_notification(new_notifications, state_config.STATE_NAME, telegram_prefix):
-            logger.info(f"Processing complete. All {len(new_notifications)} notifications have been sent via Telegram")
-        else:
-            logger.warning("Telegram notification failed, but notifications were saved locally")
-    else:
-        logger.info("No new notifications found")
+        new_breaches.append((org_name, full_url))
     
-    logger.info(f"{state_config.STATE_NAME} processing complete. Found {new_breaches} new breaches, {len(new_notifications)} sent via Telegram")
-    return True
+    return process_new_breaches(state_config, state_name, new_breaches)
 
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(description='Unified breach notification monitor')
-    parser.add_argument('state', nargs='?', choices=['maine', 'washington', 'vermont', 'newhampshire', 'idaho', 'california', 'iowa'], 
+    parser.add_argument('state', nargs='?', choices=STATES, 
                        help='State to monitor (if not specified, processes all states)')
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help=f'States processed in parallel (default: {WORKERS}, 1 processes them one by one)')
+    parser.add_argument('--backfill', action='store_true',
+                        help=f'Process every unseen notification since each state\'s watermark '
+                             f'(the last {BACKFILL_DAYS} days for a state without one)')
+    parser.add_argument('--from', dest='start_date', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                        help='Process the notifications from this date instead of yesterday\'s')
+    parser.add_argument('--to', dest='end_date', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                        help='Last date processed with --from (default: yesterday)')
     args = parser.parse_args()
+    if args.end_date and not args.start_date:
+        parser.error('--to requires --from')
+    if args.backfill and args.start_date:
+        parser.error('--backfill and --from are mutually exclusive')
+    
+    watermarks = Watermarks(WATERMARKS_FILE)
     
     # Determine which states to process
     if args.state:
         states_to_process = [args.state]
         logger.info(f"Processing single state: {args.state}")
     else:
-        states_to_process = ['maine', 'washington', 'vermont', 'newhampshire', 'idaho', 'california', 'iowa']
+        states_to_process = STATES
         logger.info("No specific state provided - processing all states")
     
-    # Process each state
-    successful_states = 0
-    total_states = len(states_to_process)
+    # Process the states; results come back in the order of states_to_process
+    run = lambda state: run_state(state, watermarks, *state_window(state, watermarks, args))
+    workers = max(1, min(args.workers, len(states_to_process)))
+    if workers == 1:
+        results = [run(state) for state in states_to_process]
+    else:
+        logger.info(f"Processing {len(states_to_process)} states with {workers} workers")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='state') as executor:
+            results = list(executor.map(run, states_to_process))
     
-    for state in states_to_process:
-        try:
-            success = process_state(state)
-            if success:
-                successful_states += 1
-            else:
-                logger.error(f"Failed to process {state}")
-        except Exception as e:
-            logger.error(f"Error processing {state}: {e}")
+    successful_states = sum(1 for result in results if result['success'])
+    total_states = len(states_to_process)
     
     # Final summary
     logger.info(f"{'='*60}")
     logger.info(f"FINAL SUMMARY")
     logger.info(f"{'='*60}")
+    for result in results:
+        status = ('PARTIAL' if result['failed'] else 'OK') if result['success'] else 'FAILED'
+        logger.info(f"{result['state']:<13} {status:<8} {result['new_breaches']:>3} new breaches, "
+                    f"{result['notifications']:>3} notifications, {result['window']} ({result['seconds']:.1f}s)")
     logger.info(f"Successfully processed {successful_states}/{total_states} states")
     
     if successful_states == total_states:
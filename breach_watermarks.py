@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Per-state watermarks of the breach monitor: the last day up to which every
+notification of a state has been processed.
+"""
+
+import json
+import threading
+from datetime import date, timedelta
+
+from atomic_file import write_json
+
+class Watermarks:
+    """Last fully processed day of each state, saved as YYYY-MM-DD."""
+
+    def __init__(self, path):
+        self.path   = path
+        self.states = {}
+        self.lock   = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                self.states = json.load(file)
+        except FileNotFoundError:
+            pass
+
+    def get(self, state):
+        day = self.states.get(state)
+        return date.fromisoformat(day) if day else None
+
+    def advance(self, state, start_date, end_date):
+        """Record that state was processed from start_date to end_date and save.
+
+        The watermark only moves when the window joins it, so a skipped day
+        keeps it behind until a backfill covers that day. Returns True when
+        the watermark moved.
+        """
+        with self.lock:
+            watermark = self.get(state)
+            if watermark and (start_date > watermark + timedelta(days=1) or end_date <= watermark):
+                return False
+            self.states[state] = end_date.isoformat()
+            self.save()
+            return True
+
+    def save(self):
+        write_json(self.path, self.states, indent=4, sort_keys=True)
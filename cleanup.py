@@ -1,53 +1,21 @@
 #!/usr/bin/python3
-import feedparser
-import requests
-import json
-import base64
-import functools
-import re
-import hashlib
-import os
-from datetime import datetime, timedelta
-from feedgen.feed import FeedGenerator
+import feed_writer
+from feed_archive import NEWS_FEEDS, news_archive
 
 # Constants
-CUTOFF_DATE     = datetime.now() - timedelta(days=28)
+CUTOFF_DATE     = feed_writer.retention_cutoff()
 
-def cleanup(file):
-    entries = []
-    unique_ids = set()
-
-    fg = FeedGenerator()
-    fg.id(f'https://raw.githubusercontent.com/Casualtek/Cyberwatch/main/{file}')
-    fg.title('Cyberattacks News')
-    fg.author( {'name':'Valéry Marchive','email':'valery@casualtek.com'} )
-    fg.language('en')
-    fg.link( href='https://www.lemagit.fr', rel='self')
-    fg.description('Custom News Feed')
-
-    existing_entries = feedparser.parse(f'./{file}')
-
-    entries = [item for item in existing_entries.entries if datetime.strptime(f'{item.published_parsed[0]}-{item.published_parsed[1]}-{item.published_parsed[2]}', '%Y-%m-%d') > CUTOFF_DATE]
-
-    for entry in entries:
-        title = entry.title
-        link  = entry.id
-        date  = entry.published
-
-        fe = fg.add_entry()
-        fe.id(link)
-        fe.title(title)
-        fe.link( href=f'{link}', rel='self')
-        fe.pubDate(date)
-
-    # Save the output to a file
-    fg.rss_str(pretty=True)
-    fg.rss_file(f'./{file}')
+def cleanup(name):
+    # Day shards older than the retention window are deleted; the head feed is
+    # streamed one item at a time, so memory use does not grow with the feed.
+    archive = news_archive(name)
+    shards  = archive.expire(feed_writer.RETENTION_DAYS)
+    dropped = feed_writer.drop_expired(archive.head_path, CUTOFF_DATE)
+    print(f'{name}: deleted {shards} shards and dropped {dropped} items older than {feed_writer.RETENTION_DAYS} days.')
 
 def main():
-    cleanup('cyberattacks_news.xml')
-    cleanup('unlikely_cyberattacks_news.xml')
+    for name in NEWS_FEEDS:
+        cleanup(name)
 
 if __name__ == '__main__':
     main()
-
@@ -1,18 +1,28 @@
 #!/usr/bin/python3
 import argparse
+import hashlib
 import json
 import os
 import requests
 import PyPDF2
 import re
+import threading
 from datetime import datetime
-from groq import Groq
+from groq import APIError, Groq
 from io import BytesIO
 import domain_discovery
+from pdf_cache import PdfCache
 from pydantic import BaseModel, ValidationError
 
 groq_api_key   = os.environ.get('GROQ_API')
 gpt_model      = 'llama-3.1-8b-instant'
+# Optional rate_limit.HostLimiter for the PDF downloads, set by breach_monitor.py.
+limiter        = None
+# Concurrent downloads, PDF parses and LLM calls when breach_monitor.py
+# enriches several breaches at once.
+http_slots     = threading.BoundedSemaphore(int(os.environ.get('BREACH_HTTP_SLOTS', '8')))
+pdf_slots      = threading.BoundedSemaphore(int(os.environ.get('BREACH_PDF_SLOTS', '2')))
+llm_slots      = threading.BoundedSemaphore(int(os.environ.get('BREACH_LLM_SLOTS', '2')))
 
 headers = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; rv:102.0) Gecko/20100101 Firefox/102.0',
@@ -23,7 +33,35 @@ headers = {
     'Upgrade-Insecure-Requests': '1',
 }
 
+SYSTEM_PROMPT = """
+You are a data breach analysis expert. When asked to analyze breach notifications,
+always respond with valid JSON objects that match this structure:
+{
+  "victim": "string",
+  "summary": "string", 
+  "date_discovered": "string",
+  "domain": "string"
+}
+Your response should ONLY contain the JSON object and nothing else.
+"""
+USER_PROMPT = '''Analyze this data breach notification text and extract the following information:
 
+Text to analyze:
+{text}
+
+Extract:
+- victim: Name of the organization/entity that suffered the breach
+- summary: Summary of the breach in maximum 3 sentences
+- date_discovered: Date when the incident was discovered (format: YYYY-MM-DD)  
+- domain: Primary internet domain name of the organization (e.g., company.com, leave empty if unknown)'''
+# Cached extraction results are only reused for the same prompt and model.
+EXTRACTION_VERSION = hashlib.sha256(f'{gpt_model}\n{SYSTEM_PROMPT}\n{USER_PROMPT}'.encode('utf-8')).hexdigest()[:16]
+
+cache = PdfCache()
+
+class TransientError(Exception):
+    """A page fetch, PDF download or LLM call failed: unlike a notice that
+    yields nothing, the breach should be tried again by a later run."""
 
 def extract_country_code(text):
     pattern = r'\b[A-Z]{3}\b'
@@ -33,14 +71,20 @@ def extract_country_code(text):
     else:
         return None
 
-def extract_pdf_metadata(pdf_file):
-    pdf_reader = PyPDF2.PdfReader(pdf_file)
-    text = ""
+def extract_pdf_text(pdf_file):
+    with pdf_slots:
+        pdf_reader = PyPDF2.PdfReader(pdf_file)
+        text = ""
+
+        for page_num in range(len(pdf_reader.pages)):
+            page = pdf_reader.pages[page_num]
+            text += page.extract_text()
+    return text
 
-    for page_num in range(len(pdf_reader.pages)):
-        page = pdf_reader.pages[page_num]
-        text += page.extract_text()
+def extract_pdf_metadata(pdf_file):
+    return extract_text_metadata(extract_pdf_text(pdf_file))
 
+def extract_text_metadata(text):
     text_without_images = ""
 
     for word in text.split():
@@ -70,42 +114,25 @@ def extract_pdf_metadata(pdf_file):
         domain: str
 
     # Extract all metadata at once using structured JSON
-    system_prompt = """
-You are a data breach analysis expert. When asked to analyze breach notifications,
-always respond with valid JSON objects that match this structure:
-{
-  "victim": "string",
-  "summary": "string", 
-  "date_discovered": "string",
-  "domain": "string"
-}
-Your response should ONLY contain the JSON object and nothing else.
-"""
-    
     messages = [
-        {'role': 'system', 'content': system_prompt},
-        {'role': 'user', 'content': f'''Analyze this data breach notification text and extract the following information:
-
-Text to analyze:
-{merged_text}
-
-Extract:
-- victim: Name of the organization/entity that suffered the breach
-- summary: Summary of the breach in maximum 3 sentences
-- date_discovered: Date when the incident was discovered (format: YYYY-MM-DD)  
-- domain: Primary internet domain name of the organization (e.g., company.com, leave empty if unknown)'''}
+        {'role': 'system', 'content': SYSTEM_PROMPT},
+        {'role': 'user', 'content': USER_PROMPT.format(text=merged_text)}
     ]
     
     try:
-        metadata_response = client.chat.completions.create(
-            model=gpt_model,
-            messages=messages,
-            max_tokens=400,
-            n=1,
-            temperature=0.1,
-            response_format={"type": "json_object"}
-        )
-        
+        with llm_slots:
+            metadata_response = client.chat.completions.create(
+                model=gpt_model,
+                messages=messages,
+                max_tokens=400,
+                n=1,
+                temperature=0.1,
+                response_format={"type": "json_object"}
+            )
+    except APIError as e:
+        raise TransientError(f"Groq call failed: {e}") from e
+    
+    try:
         # Parse JSON and validate with Pydantic
         response_content = metadata_response.choices[0].message.content
         json_data = json.loads(response_content)
@@ -134,7 +161,9 @@ Extract:
     
     # If LLM didn't provide a domain, try domain discovery as fallback
     if not domain_name and victim:
-        domain_name = domain_discovery.discover_domain(victim, client, model=gpt_model)
+        # Mostly LLM calls, so it shares their limit.
+        with llm_slots:
+            domain_name = domain_discovery.discover_domain(victim, client, model=gpt_model)
 
     return {
         'victim': victim,
@@ -144,15 +173,52 @@ Extract:
     }
 
 
-def main(pdf_url):
+def download_pdf(pdf_url):
+    """Return the content hash of the PDF at pdf_url, downloading it only if
+    the cached copy is missing or stale."""
+    digest, etag, last_modified = cache.validators(pdf_url)
+    request_headers = dict(headers)
+    if etag:
+        request_headers['If-None-Match'] = etag
+    if last_modified:
+        request_headers['If-Modified-Since'] = last_modified
+    if limiter:
+        limiter.acquire(pdf_url)
     try:
-        pdf_response = requests.get(pdf_url, headers=headers, timeout=30)
+        with http_slots:
+            pdf_response = requests.get(pdf_url, headers=request_headers, timeout=30)
         pdf_response.raise_for_status()
     except requests.RequestException as e:
-        print(f"Error downloading PDF: {e}")
+        raise TransientError(f"Error downloading PDF {pdf_url}: {e}") from e
+    if pdf_response.status_code == 304 and digest:
+        return digest
+    return cache.put_pdf(pdf_url, pdf_response.content,
+                         pdf_response.headers.get('ETag'), pdf_response.headers.get('Last-Modified'))
+
+def pdf_metadata(digest):
+    """Extract the metadata of a cached PDF, reusing the text and LLM result
+    of an earlier extraction of the same content."""
+    metadata = cache.result(digest, EXTRACTION_VERSION)
+    if metadata is not None:
+        return metadata
+    text = cache.text(digest)
+    if text is None:
+        text = extract_pdf_text(BytesIO(cache.pdf(digest)))
+        cache.put_text(digest, text)
+    metadata = extract_text_metadata(text)
+    # An unusable LLM response leaves the victim empty; it is retried next time.
+    if metadata['victim']:
+        cache.put_result(digest, EXTRACTION_VERSION, metadata)
+    return metadata
+
+def main(pdf_url):
+    digest = download_pdf(pdf_url)
+    if not digest:
         return None
     
-    metadata = extract_pdf_metadata(BytesIO(pdf_response.content))
+    metadata = pdf_metadata(digest)
+    # A notice served from the cache only updates its recency, kept for eviction.
+    cache.flush()
     
     domain = metadata['domain']
     if not domain:
@@ -0,0 +1,178 @@
+#!/usr/bin/python3
+"""
+Day-sharded archive of the news feeds.
+
+Every item is written once to the shard of the day it was added
+(archive/<name>/YYYY-MM-DD.xml) and to the rolling head feed, which only
+keeps the items published during the last HEAD_DAYS days. Past shards are
+never rewritten, so a run only changes today's shard, the head feed and
+the manifest listing the shards.
+
+Items whose verdict did not come from Claude (the pre-filter, a noise
+source) are listed next to their shard, in YYYY-MM-DD.settled.jsonl, so
+the pre-filter is trained on Claude's verdicts only.
+
+Usage:
+  python feed_archive.py split   # move the items of the existing feeds into shards
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import feed_writer
+from atomic_file import write_json
+
+ARCHIVE_DIR = './archive'
+HEAD_DAYS   = 2
+
+NEWS_FEEDS = {
+    'likely': ('./cyberattacks_news.xml', 'Cyberattacks News',
+               'Aggregated and Translated Likely Cyberattacks News Feed'),
+    'unlikely': ('./unlikely_cyberattacks_news.xml', 'Cyberattacks News (low likeliness)',
+                 'Aggregated and Translated Unlikely Cyberattacks News Feed'),
+}
+
+def today():
+    return datetime.now(timezone.utc).date().isoformat()
+
+class FeedArchive:
+    """Head feed and per-day shards of one news feed."""
+
+    def __init__(self, name, head_path, title='', description='', directory=ARCHIVE_DIR):
+        self.name          = name
+        self.head_path     = head_path
+        self.title         = title
+        self.description   = description
+        self.directory     = os.path.join(directory, name)
+        self.manifest_path = os.path.join(self.directory, 'manifest.json')
+        self.shards        = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as file:
+                self.shards = json.load(file)['shards']
+        except FileNotFoundError:
+            pass
+
+    def save(self):
+        manifest = {
+            'name': self.name,
+            'head': os.path.basename(self.head_path),
+            'head_days': HEAD_DAYS,
+            'shards': dict(sorted(self.shards.items(), reverse=True)),
+        }
+        write_json(self.manifest_path, manifest, indent=4)
+
+    def shard_path(self, day):
+        return os.path.join(self.directory, f'{day}.xml')
+
+    def settled_path(self, day):
+        return os.path.join(self.directory, f'{day}.settled.jsonl')
+
+    def settled_ids(self):
+        """IDs of the items settled without Claude, in any shard."""
+        ids = set()
+        for day in self.shards:
+            try:
+                with open(self.settled_path(day), 'r', encoding='utf-8') as file:
+                    ids.update(json.loads(line)['id'] for line in file if line.strip())
+            except FileNotFoundError:
+                pass
+        return ids
+
+    def paths(self):
+        """Shards, newest first."""
+        return [self.shard_path(day) for day in sorted(self.shards, reverse=True)]
+
+    def ids(self):
+        # Items of an interrupted run can only be in the head or today's shard.
+        ids = set()
+        for path in (self.head_path, self.shard_path(today())):
+            if os.path.exists(path):
+                ids |= feed_writer.feed_ids(path)
+        return ids
+
+    def append(self, day, items):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.shard_path(day)
+        if not os.path.exists(path):
+            feed_writer.create_feed(path, f'{self.title} ({day})', self.description)
+        feed_writer.prepend_items(path, items)
+        shard = self.shards.setdefault(day, {'file': os.path.basename(path), 'items': 0})
+        shard['items'] += len(items)
+
+    def record_settled(self, day, settled):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.settled_path(day), 'a', encoding='utf-8') as file:
+            for item_id, settled_by in settled.items():
+                file.write(json.dumps({'id': item_id, 'settled_by': settled_by}) + '\n')
+
+    def add(self, items, settled=None):
+        """Write new items to today's shard and to the head feed.
+
+        settled maps the IDs of the items settled without Claude to what
+        settled them. Returns the number of items that aged out of the head
+        feed.
+        """
+        if not items:
+            return 0
+        # A head feed written before the archive existed is split first, so
+        # none of its items are lost when the head window is applied.
+        if not self.shards and os.path.exists(self.head_path):
+            self.split()
+        if settled:
+            self.record_settled(today(), settled)
+        self.append(today(), items)
+        self.save()
+        if not os.path.exists(self.head_path):
+            feed_writer.create_feed(self.head_path, self.title, self.description)
+        return feed_writer.prepend_items(self.head_path, items, feed_writer.retention_cutoff(HEAD_DAYS))
+
+    def expire(self, days=feed_writer.RETENTION_DAYS):
+        cutoff  = (datetime.now(timezone.utc) - timedelta(days=days)).date().isoformat()
+        expired = [day for day in self.shards if day < cutoff]
+        for day in expired:
+            for path in (self.shard_path(day), self.settled_path(day)):
+                if os.path.exists(path):
+                    os.remove(path)
+            del self.shards[day]
+        if expired:
+            self.save()
+        return len(expired)
+
+    def split(self):
+        """Move the items of a head feed written before the archive existed
+        into shards, by publication day."""
+        days = {}
+        with open(self.head_path, 'r', encoding='utf-8') as file:
+            for is_item, text in feed_writer.iter_segments(file):
+                if is_item:
+                    date = feed_writer.published(text)
+                    days.setdefault(date.date().isoformat() if date else today(), []).append(text)
+        # prepend_items() expects the oldest item first.
+        for day, items in days.items():
+            self.append(day, items[::-1])
+        self.save()
+        feed_writer.drop_expired(self.head_path, feed_writer.retention_cutoff(HEAD_DAYS))
+        return sum(len(items) for items in days.values()), len(days)
+
+def news_archive(name):
+    return FeedArchive(name, *NEWS_FEEDS[name])
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the day-sharded news feed archive.')
+    parser.add_argument('command', choices=['split'])
+    parser.parse_args()
+
+    for name in NEWS_FEEDS:
+        archive = news_archive(name)
+        items, days = archive.split()
+        print(f'{archive.head_path}: {items} items moved to {days} shards in {archive.directory}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+"""
+Google News query planner for rss.py.
+
+The feeds are described per language as a list of search terms and a list
+of locales. All the terms of a language are merged into one OR query per
+locale; a merged query is only split again (in halves) once a run has seen
+it return a full page of results, which means some were cut off. As the
+merged query is then no longer fetched, it stays split.
+
+Usage:
+  python feed_planner.py         # print the planned feeds and the request counts
+"""
+
+import json
+import sys
+from urllib.parse import quote_plus
+
+SEARCH_URL  = 'https://news.google.com/rss/search'
+WINDOW      = 'when:12h'
+# Google News RSS search returns at most this many items.
+MAX_RESULTS = 100
+
+# Locales are (hl, gl, ceid), as used by Google News.
+LANGUAGES = {
+    'en': {
+        'terms': ['cyber attack'],
+        'locales': [('en-CA', 'CA', 'CA:en'), ('en-US', 'US', 'US:en'), ('en-IN', 'IN', 'IN:en'),
+                    ('en-AU', 'AU', 'AU:en'), ('en-GB', 'GB', 'GB:en'), ('en-NZ', 'NZ', 'NZ:en'),
+                    ('en-ZA', 'ZA', 'ZA:en')],
+    },
+    'fr': {
+        'terms': ['attaque informatique', 'cyber attaque'],
+        'locales': [('fr-FR', 'FR', 'FR:fr'), ('fr-BE', 'BE', 'BE:fr'), ('fr-CH', 'CH', 'CH:fr')],
+    },
+    'de': {
+        'terms': ['cyber angriff'],
+        'locales': [('de-CH', 'CH', 'CH:de'), ('de-DE', 'DE', 'DE:de'), ('de-AT', 'AT', 'AT:de')],
+    },
+    'es': {
+        'terms': ['ataque cibernetico'],
+        'locales': [('es-ES', 'ES', 'ES:es'), ('es-MX', 'MX', 'MX:es'), ('es-CL', 'CL', 'CL:es')],
+    },
+    'pt': {
+        'terms': ['ataque cibernetico'],
+        'locales': [('pt-PT', 'PT', 'PR:pt'), ('pt-BR', 'BR', 'BR:pt')],
+    },
+    'it': {'terms': ['attacco informatico'], 'locales': [('it', 'IT', 'IT:it')]},
+    'nl': {'terms': ['cyberaanval'], 'locales': [('nl', 'NL', 'NL:nl')]},
+    'da': {'terms': ['cyberangreb'], 'locales': [('dk', 'DK', 'DK:dk')]},
+    'fi': {'terms': ['verkkohyökkäys'], 'locales': [('fi', 'FI', 'FI:fi')]},
+    'sv': {'terms': ['cyberattack'], 'locales': [('se', 'SE', 'SE:se')]},
+    'no': {'terms': ['cyberangrep'], 'locales': [('no', 'NO', 'NO:no')]},
+    'ja': {'terms': ['サイバー攻撃'], 'locales': [('ja', 'JP', 'JP:ja')]},
+    # Simplified and traditional spellings, so every Chinese edition matches both.
+    'zh': {
+        'terms': ['网络攻击', '網路攻擊', '網絡攻擊'],
+        'locales': [('zh-CN', 'CN', 'CN:zh-Hans'), ('zh-TW', 'TW', 'TW:zh-Hant'), ('zh-HK', 'HK', 'HK:zh-Hant')],
+    },
+}
+
+def query(terms):
+    if len(terms) == 1:
+        return terms[0]
+    return ' OR '.join(f'({term})' if ' ' in term else term for term in terms)
+
+def feed_url(terms, locale):
+    hl, gl, ceid = locale
+    q = quote_plus(f'{WINDOW} {query(terms)}', safe=':')
+    return f'{SEARCH_URL}?tbm=nws&q={q}&scoring=n&hl={hl}&gl={gl}&ceid={ceid}'
+
+def plan_terms(terms, locale, results):
+    # results maps feed URLs to the number of items they last returned.
+    url = feed_url(terms, locale)
+    if len(terms) == 1 or results.get(url, 0) < MAX_RESULTS:
+        return [url]
+    middle = len(terms) // 2
+    return plan_terms(terms[:middle], locale, results) + plan_terms(terms[middle:], locale, results)
+
+def plan(results=None, languages=LANGUAGES):
+    """Return the (url, english) pairs to fetch."""
+    results = results or {}
+    return [(url, language == 'en')
+            for language, spec in languages.items()
+            for locale in spec['locales']
+            for url in plan_terms(spec['terms'], locale, results)]
+
+def request_counts(results=None, languages=LANGUAGES):
+    unmerged = sum(len(spec['terms']) * len(spec['locales']) for spec in languages.values())
+    return unmerged, len(plan(results, languages))
+
+def load_results(path):
+    # Result counts recorded by rss.py in its feed schedule.
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            feeds = json.load(file).get('feeds', {})
+    except FileNotFoundError:
+        return {}
+    return {url: stats['results'] for url, stats in feeds.items() if 'results' in stats}
+
+def main():
+    results = load_results('./feed_schedule.json')
+    for url, english in plan(results):
+        print(url)
+    unmerged, planned = request_counts(results)
+    print(f'{planned} requests per run ({unmerged} with one request per term and locale).')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/python3
+import json
+import time
+
+from atomic_file import write_json
+
+# Weight of the latest poll in a feed's yield (new likely items per poll).
+YIELD_SMOOTHING    = 0.2
+# When the previous run used more than this share of its deadline, feeds whose
+# yield is below LOW_YIELD are only polled every LOW_YIELD_INTERVAL seconds.
+TIGHT_BUDGET_SHARE = 0.5
+LOW_YIELD          = 0.1
+LOW_YIELD_INTERVAL = 4 * 3600
+# GUIDs remembered per feed. Parsing stops at the first known one, so only
+# the newest few are needed; a feed whose top items all disappeared is read
+# in full and deduplicated by the seen store. The state file is rewritten
+# every run, so it stays small.
+MAX_GUIDS          = 5
+
+class Deadline:
+    """Wall-clock budget of a run; a budget of 0 never expires."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.start()
+
+    def start(self):
+        self.started = time.monotonic()
+        self.stopped = False
+
+    def expire(self):
+        self.stopped = True
+
+    def remaining(self):
+        if self.stopped:
+            return 0
+        if not self.seconds:
+            return float('inf')
+        return self.seconds - (time.monotonic() - self.started)
+
+    def expired(self, reserve=0):
+        return self.remaining() <= reserve
+
+class FeedSchedule:
+    """Per-feed yield history, used to poll the most productive feeds first.
+
+    Feeds that were never polled get an infinite yield, so new locales are
+    always fetched on their first run.
+
+    Each feed also keeps its HTTP validators and the GUIDs of its newest
+    items. Those are staged by fetched() and only kept once advance() is
+    called, after every new entry of the feed has been handled.
+    """
+
+    def __init__(self, path):
+        self.path          = path
+        self.feeds         = {}
+        self.last_run      = 0
+        self.last_deadline = 0
+        self.staged        = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return
+        self.feeds         = state.get('feeds', {})
+        self.last_run      = state.get('last_run_seconds', 0)
+        self.last_deadline = state.get('last_deadline_seconds', 0)
+
+    def feed_yield(self, url):
+        return self.feeds.get(url, {}).get('yield', float('inf'))
+
+    def order(self, urls):
+        # sorted() is stable, so feeds with the same yield keep their order.
+        return sorted(urls, key=self.feed_yield, reverse=True)
+
+    def tight(self):
+        return bool(self.last_deadline) and self.last_run > TIGHT_BUDGET_SHARE * self.last_deadline
+
+    def due(self, url, now=None):
+        stats = self.feeds.get(url, {})
+        if 'yield' not in stats or stats['yield'] >= LOW_YIELD or not self.tight():
+            return True
+        return (now or time.time()) - stats['last_polled'] >= LOW_YIELD_INTERVAL
+
+    def record(self, url, likely, now=None):
+        stats = self.feeds.setdefault(url, {})
+        if 'yield' not in stats:
+            stats.update({'yield': float(likely), 'polls': 0})
+        else:
+            stats['yield'] = round((1 - YIELD_SMOOTHING) * stats['yield'] + YIELD_SMOOTHING * likely, 4)
+        stats['polls']      += 1
+        stats['last_polled'] = int(now or time.time())
+
+    def observe(self, url, results):
+        # Total items in the response, used by feed_planner.py to split
+        # merged queries whose results were cut off.
+        self.feeds.setdefault(url, {})['results'] = results
+
+    def validators(self, url):
+        stats = self.feeds.get(url, {})
+        return stats.get('etag'), stats.get('last_modified')
+
+    def known_guids(self, url):
+        return set(self.feeds.get(url, {}).get('guids', ()))
+
+    def fetched(self, url, etag, last_modified, guids):
+        # guids are the new items of this fetch, newest first.
+        known = [guid for guid in self.feeds.get(url, {}).get('guids', ()) if guid not in guids]
+        self.staged[url] = {'etag': etag, 'last_modified': last_modified, 'guids': (list(guids) + known)[:MAX_GUIDS]}
+
+    def advance(self, url):
+        if url in self.staged:
+            self.feeds.setdefault(url, {}).update(self.staged.pop(url))
+
+    def save(self, run_seconds, deadline_seconds):
+        state = {
+            'last_run_seconds': round(run_seconds, 3),
+            'last_deadline_seconds': deadline_seconds,
+            'feeds': self.feeds,
+        }
+        write_json(self.path, state)
@@ -0,0 +1,253 @@
+#!/usr/bin/python3
+import argparse
+import os
+import re
+import shutil
+import multiprocessing
+import resource
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from xml.sax.saxutils import escape
+
+from atomic_file import atomic_writer
+
+CHUNK_SIZE = 64 * 1024
+# Items published longer ago than this are dropped from the feeds.
+RETENTION_DAYS = 28
+
+_LAST_BUILD_RE = re.compile(r'<lastBuildDate>[^<]*</lastBuildDate>')
+_PUB_DATE_RE   = re.compile(r'<pubDate>([^<]*)</pubDate>')
+
+def format_date(date):
+    # Same RFC 822 form as feedgen, e.g. "Sat, 22 Aug 2026 14:34:00 +0000".
+    return format_datetime(parsedate_to_datetime(date))
+
+def format_item(title, link, date):
+    return (f'<item><title>{escape(str(title))}</title>'
+            f'<guid isPermaLink="false">{escape(link)}</guid>'
+            f'<pubDate>{format_date(date)}</pubDate></item>')
+
+FEED_FOOTER = '</channel></rss>'
+
+def feed_header(title, description):
+    now = format_datetime(datetime.now(timezone.utc))
+    return ("<?xml version='1.0' encoding='UTF-8'?>\n"
+            '<rss xmlns:atom="http://www.w3.org/2005/Atom" xmlns:content="http://purl.org/rss/1.0/modules/content/" version="2.0">'
+            f'<channel><title>{escape(title)}</title><link>https://www.lemagit.fr</link>'
+            f'<description>{escape(description)}</description>'
+            '<atom:link href="https://www.lemagit.fr" rel="self"/>'
+            '<docs>http://www.rssboard.org/rss-specification</docs>'
+            '<generator>python-feedgen</generator><language>en</language>'
+            f'<lastBuildDate>{now}</lastBuildDate>')
+
+def create_feed(path, title, description):
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(feed_header(title, description) + FEED_FOOTER)
+
+def retention_cutoff(days=RETENTION_DAYS):
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+def published(item):
+    match = _PUB_DATE_RE.search(item)
+    if not match:
+        return None
+    try:
+        date = parsedate_to_datetime(match.group(1).strip())
+    except (TypeError, ValueError):
+        return None
+    return date if date.tzinfo else date.replace(tzinfo=timezone.utc)
+
+def iter_segments(source, buffer=''):
+    """Split the rest of a feed into (is_item, text) segments.
+
+    At most one item and one chunk are held in memory at a time.
+    """
+    position = 0
+    while True:
+        start = buffer.find('<item>', position)
+        end   = buffer.find('</item>', start) if start != -1 else -1
+        if end == -1:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                if start != -1:
+                    raise ValueError('Unterminated <item> element')
+                if position < len(buffer):
+                    yield False, buffer[position:]
+                return
+            if start == -1:
+                # Keep the end of the buffer in case it holds the start of a tag.
+                split = max(position, len(buffer) - len('<item>'))
+                if split > position:
+                    yield False, buffer[position:split]
+                position = split
+            buffer   = buffer[position:] + chunk
+            position = 0
+            continue
+        if start > position:
+            yield False, buffer[position:start]
+        end += len('</item>')
+        yield True, buffer[start:end]
+        position = end
+
+def copy_segments(segments, target, cutoff=None):
+    """Write segments to target, leaving out items published before cutoff.
+
+    Items without a readable pubDate are kept. Returns the number of items
+    dropped.
+    """
+    dropped    = 0
+    whitespace = ''
+    for is_item, text in segments:
+        if not is_item and not text.strip():
+            # Indentation in front of an item goes (or stays) with it.
+            whitespace += text
+            continue
+        if is_item and cutoff is not None:
+            date = published(text)
+            if date is not None and date < cutoff:
+                dropped   += 1
+                whitespace = ''
+                continue
+        target.write(whitespace)
+        target.write(text)
+        whitespace = ''
+    target.write(whitespace)
+    return dropped
+
+def prepend_items(path, items, cutoff=None):
+    """Splice serialized <item> elements in front of the existing items.
+
+    Only the channel header is read into memory; the existing items are
+    streamed to the new file unchanged, except that with a cutoff the ones
+    published before it are dropped on the way. Returns the number of items
+    dropped.
+    """
+    with open(path, 'r', encoding='utf-8') as source:
+        head = ''
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            head += chunk
+            positions = [position for position in (head.find('<item>'), head.find('</channel>')) if position != -1]
+            if positions or not chunk:
+                break
+        if not positions:
+            raise ValueError(f'{path} has no <channel> element')
+        split = min(positions)
+
+        now = format_datetime(datetime.now(timezone.utc))
+        with atomic_writer(path) as target:
+            target.write(_LAST_BUILD_RE.sub(f'<lastBuildDate>{now}</lastBuildDate>', head[:split], count=1))
+            # Most recent items first, as feedgen does when prepending entries.
+            for item in reversed(items):
+                target.write(item)
+            if cutoff is None:
+                target.write(head[split:])
+                shutil.copyfileobj(source, target, CHUNK_SIZE)
+                dropped = 0
+            else:
+                dropped = copy_segments(iter_segments(source, head[split:]), target, cutoff)
+    return dropped
+
+def drop_expired(path, cutoff=None):
+    """Streaming retention pass: drop the items published before cutoff."""
+    return prepend_items(path, [], cutoff or retention_cutoff())
+
+def count_items(path):
+    if not os.path.exists(path):
+        return 0
+    count = 0
+    tail  = ''
+    with open(path, 'r', encoding='utf-8') as file:
+        while True:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                return count
+            # Keep the end of the previous chunk in case a tag straddles two chunks.
+            text  = tail + chunk
+            count += text.count('<item>')
+            tail  = text[-5:]
+
+def feed_ids(path):
+    ids = set()
+    for event, element in ET.iterparse(path):
+        if element.tag == 'guid':
+            ids.add(element.text)
+        elif element.tag == 'item':
+            element.clear()
+    return ids
+
+def rebuild(path, items):
+    # The previous write path of rss.py: parse every entry with feedparser and
+    # regenerate the whole document with feedgen.
+    import feedparser
+    from feedgen.feed import FeedGenerator
+
+    fg = FeedGenerator()
+    fg.id(path)
+    fg.title('Cyberattacks News')
+    fg.link( href='https://www.lemagit.fr', rel='self')
+    fg.description('Benchmark')
+    for entry in feedparser.parse(path).entries:
+        fe = fg.add_entry()
+        fe.id(entry.id)
+        fe.title(entry.title)
+        fe.link( href=f'{entry.id}', rel='self')
+        fe.pubDate(entry.published)
+    for title, link, date in items:
+        fe = fg.add_entry()
+        fe.id(link)
+        fe.title(title)
+        fe.link( href=f'{link}', rel='self')
+        fe.pubDate(date)
+    fg.rss_str(pretty=True)
+    fg.rss_file(path)
+
+def _measure(queue, function, args):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start  = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+    after  = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, (after - before) * 1024))
+
+def measure(function, *args):
+    # Each writer runs in its own process so that the peak RSS growth of one
+    # does not hide the other.
+    context = multiprocessing.get_context('fork')
+    queue   = context.Queue()
+    process = context.Process(target=_measure, args=(queue, function, args))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def benchmark(path, count):
+    date  = format_datetime(datetime.now(timezone.utc))
+    items = [(f'Benchmark title {index}', f'https://example.com/{index}', date) for index in range(count)]
+    with tempfile.TemporaryDirectory() as directory:
+        copy = os.path.join(directory, os.path.basename(path))
+
+        shutil.copy(path, copy)
+        rebuild_time, rebuild_peak = measure(rebuild, copy, items)
+
+        shutil.copy(path, copy)
+        splice_time, splice_peak = measure(prepend_items, copy, [format_item(*item) for item in items])
+
+    size = os.path.getsize(path) / 1e6
+    print(f'{path} ({size:.1f} MB), {count} new items')
+    print(f'{"writer":>10} {"time (s)":>10} {"peak RSS growth (MB)":>21}')
+    print(f'{"rebuild":>10} {rebuild_time:>10.2f} {rebuild_peak / 1e6:>21.1f}')
+    print(f'{"splice":>10} {splice_time:>10.2f} {splice_peak / 1e6:>21.1f}')
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the incremental feed writer against a full rebuild.')
+    parser.add_argument('path', nargs='?', default='./cyberattacks_news.xml', help='Feed file to benchmark against.')
+    parser.add_argument('--items', type=int, default=100, help='Number of new items to add.')
+    args = parser.parse_args()
+    benchmark(args.path, args.items)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+import json
+import threading
+import time
+
+from atomic_file import atomic_writer
+
+class JournalStore:
+    """Persistent key/value store backed by an append-only JSON lines journal.
+
+    Every put() is written to disk straight away, so nothing is lost if the
+    process dies. Entries older than max_age_days are dropped by compact(),
+    which also squashes superseded records.
+    """
+
+    def __init__(self, path, max_age_days):
+        self.path    = path
+        self.max_age = max_age_days * 86400
+        self.items   = {}
+        self.records = 0
+        self.lock    = threading.Lock()
+        self.load()
+        self.file    = open(self.path, 'a', encoding='utf-8')
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A run killed mid-write can leave a truncated last line.
+                        continue
+                    self.items[record['k']] = (record['v'], record['t'])
+                    self.records += 1
+        except FileNotFoundError:
+            pass
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, key, default=None):
+        item = self.items.get(key)
+        if item is None:
+            return default
+        return item[0]
+
+    def entries(self):
+        return [(key, value) for key, (value, added) in self.items.items()]
+
+    def put(self, key, value):
+        now = int(time.time())
+        with self.lock:
+            self.items[key] = (value, now)
+            self.file.write(json.dumps({'k': key, 'v': value, 't': now}, ensure_ascii=False) + '\n')
+            self.file.flush()
+            self.records += 1
+
+    def clear(self):
+        self.file.close()
+        self.items   = {}
+        self.records = 0
+        self.file    = open(self.path, 'w', encoding='utf-8')
+
+    def compact(self):
+        cutoff  = int(time.time()) - self.max_age
+        expired = [key for key, (value, added) in self.items.items() if added < cutoff]
+        for key in expired:
+            del self.items[key]
+        if not expired and self.records == len(self.items):
+            return 0
+
+        self.file.close()
+        with atomic_writer(self.path) as file:
+            for key, (value, added) in self.items.items():
+                file.write(json.dumps({'k': key, 'v': value, 't': added}, ensure_ascii=False) + '\n')
+        self.records = len(self.items)
+        self.file    = open(self.path, 'a', encoding='utf-8')
+        return len(expired)
+
+    def close(self):
+        self.compact()
+        self.file.close()
@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+import hashlib
+import json
+import re
+import time
+import unicodedata
+
+from atomic_file import write_json
+
+# Titles whose 64-bit SimHash fingerprints differ by at most this many bits
+# are treated as the same story.
+MAX_DISTANCE   = 6
+# The fingerprint is split into MAX_DISTANCE + 1 bands: two fingerprints
+# within MAX_DISTANCE bits always share at least one identical band.
+BANDS          = MAX_DISTANCE + 1
+BAND_BITS      = 64 // BANDS
+SHINGLE_SIZE   = 4
+RETENTION_DAYS = 7
+
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+
+def normalize(title):
+    title = unicodedata.normalize('NFKC', title).casefold()
+    title = _PUNCTUATION_RE.sub(' ', title)
+    return ' '.join(title.split())
+
+def shingles(title):
+    # Character shingles work the same for scripts written without spaces.
+    text = normalize(title)
+    return {text[index:index + SHINGLE_SIZE] for index in range(max(len(text) - SHINGLE_SIZE + 1, 1))}
+
+def simhash(title):
+    weights = [0] * 64
+    for shingle in shingles(title):
+        value = int.from_bytes(hashlib.md5(shingle.encode('utf-8')).digest()[:8], 'big')
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+def bands(fingerprint):
+    mask = (1 << BAND_BITS) - 1
+    return [(band, fingerprint >> (band * BAND_BITS) & mask) for band in range(BANDS)]
+
+class NearDuplicateIndex:
+    """SimHash index of recently classified titles, with their verdicts.
+
+    Only titles added within the last RETENTION_DAYS are kept, so the index
+    follows the news cycle instead of growing forever.
+    """
+
+    def __init__(self, path, retention_days=RETENTION_DAYS):
+        self.path      = path
+        self.retention = retention_days * 86400
+        self.titles    = {}
+        self.buckets   = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                records = json.load(file)
+        except FileNotFoundError:
+            return
+        cutoff = int(time.time()) - self.retention
+        for record in records:
+            if record['added'] >= cutoff:
+                self._insert(int(record['fingerprint'], 16), record['verdict'], record['added'])
+
+    def _insert(self, fingerprint, verdict, added):
+        self.titles[fingerprint] = (verdict, added)
+        for band in bands(fingerprint):
+            self.buckets.setdefault(band, set()).add(fingerprint)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def match(self, title):
+        """Return the fingerprint of a recorded title close to title, or None."""
+        fingerprint = simhash(title)
+        for band in bands(fingerprint):
+            for candidate in self.buckets.get(band, ()):
+                if bin(fingerprint ^ candidate).count('1') <= MAX_DISTANCE:
+                    return candidate
+        return None
+
+    def lookup(self, title):
+        candidate = self.match(title)
+        return self.titles[candidate][0] if candidate is not None else None
+
+    def add(self, title, verdict):
+        fingerprint = simhash(title)
+        self._insert(fingerprint, verdict, int(time.time()))
+        return fingerprint
+
+    def discard(self, title):
+        fingerprint = simhash(title)
+        if self.titles.pop(fingerprint, None) is None:
+            return
+        for band in bands(fingerprint):
+            self.buckets[band].discard(fingerprint)
+
+    def save(self):
+        cutoff  = int(time.time()) - self.retention
+        records = [{'fingerprint': f'{fingerprint:016x}', 'verdict': verdict, 'added': added}
+                   for fingerprint, (verdict, added) in self.titles.items() if added >= cutoff]
+        write_json(self.path, records)
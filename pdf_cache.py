@@ -0,0 +1,162 @@
+#!/usr/bin/python3
+"""
+On-disk cache of the breach notification PDFs and of what was extracted
+from them.
+
+PDFs are stored by the SHA-256 of their content, next to their extracted
+text and to the LLM results, which are kept per extraction version (a hash
+of the prompt and model). Each URL remembers the content it last served
+and its ETag/Last-Modified, so a notice is revalidated with a conditional
+GET instead of being downloaded again. Once the stored files exceed
+max_bytes, the least recently used PDFs are evicted.
+
+Usage:
+  python pdf_cache.py   # print the size of the cache
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+from atomic_file import write_atomic, write_json
+
+CACHE_DIR = os.environ.get('PDF_CACHE_DIR', './pdf_cache')
+MAX_BYTES = int(os.environ.get('PDF_CACHE_MAX_MB', '200')) * 1024 * 1024
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+class PdfCache:
+    """PDF bytes, text and extraction results keyed by URL and content hash."""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.directory  = directory
+        self.max_bytes  = max_bytes
+        self.index_path = os.path.join(directory, 'index.json')
+        self.urls       = {}
+        self.objects    = {}
+        self.touched    = False
+        self.lock       = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                index = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self.urls    = index.get('urls', {})
+        self.objects = index.get('objects', {})
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        write_json(self.index_path, {'urls': self.urls, 'objects': self.objects})
+        self.touched = False
+
+    def touch(self, digest):
+        # Called with the lock held; the recency is saved by flush().
+        if digest in self.objects:
+            self.objects[digest]['used'] = int(time.time())
+            self.touched = True
+
+    def flush(self):
+        """Save the recency of the entries read since the last save."""
+        with self.lock:
+            if self.touched:
+                self.save()
+
+    def path(self, digest, suffix):
+        return os.path.join(self.directory, digest[:2], f'{digest}.{suffix}')
+
+    def write(self, digest, suffix, data):
+        path = self.path(digest, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, data)
+        return len(data)
+
+    def read(self, digest, suffix):
+        try:
+            with open(self.path(digest, suffix), 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+        with self.lock:
+            self.touch(digest)
+        return data
+
+    def validators(self, url):
+        """Return (digest, etag, last_modified) of the content last served by url."""
+        entry = self.urls.get(url)
+        if not entry or entry['sha256'] not in self.objects or not os.path.exists(self.path(entry['sha256'], 'pdf')):
+            return None, None, None
+        return entry['sha256'], entry.get('etag'), entry.get('last_modified')
+
+    def pdf(self, digest):
+        return self.read(digest, 'pdf')
+
+    def put_pdf(self, url, content, etag=None, last_modified=None):
+        digest = content_hash(content)
+        with self.lock:
+            if digest not in self.objects:
+                size = self.write(digest, 'pdf', content)
+                self.objects[digest] = {'size': size, 'used': int(time.time()), 'results': {}}
+            self.urls[url] = {'sha256': digest, 'etag': etag, 'last_modified': last_modified}
+            self.evict(keep=digest)
+            self.save()
+        return digest
+
+    def text(self, digest):
+        data = self.read(digest, 'txt')
+        return data.decode('utf-8') if data is not None else None
+
+    def put_text(self, digest, text):
+        with self.lock:
+            if digest not in self.objects:
+                return
+            self.objects[digest]['size'] += self.write(digest, 'txt', text.encode('utf-8'))
+            self.save()
+
+    def result(self, digest, version):
+        with self.lock:
+            obj = self.objects.get(digest)
+            if not obj or version not in obj['results']:
+                return None
+            self.touch(digest)
+            return dict(obj['results'][version])
+
+    def put_result(self, digest, version, result):
+        with self.lock:
+            if digest not in self.objects:
+                return
+            self.objects[digest]['results'][version] = result
+            self.save()
+
+    def size(self):
+        return sum(obj['size'] for obj in self.objects.values())
+
+    def evict(self, keep=None):
+        # Called with the lock held.
+        total = self.size()
+        for digest in sorted(self.objects, key=lambda digest: self.objects[digest]['used']):
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            for suffix in ('pdf', 'txt'):
+                if os.path.exists(self.path(digest, suffix)):
+                    os.remove(self.path(digest, suffix))
+            total -= self.objects.pop(digest)['size']
+        self.urls = {url: entry for url, entry in self.urls.items() if entry['sha256'] in self.objects}
+
+def main():
+    cache = PdfCache()
+    results = sum(len(obj['results']) for obj in cache.objects.values())
+    print(f'{cache.directory}: {len(cache.objects)} PDFs, {len(cache.urls)} URLs, {results} extraction results, '
+          f'{cache.size() / 1024 / 1024:.1f} of {cache.max_bytes / 1024 / 1024:.0f} MB')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+#!/usr/bin/python3
+"""
+Local likely/unlikely pre-filter for rss.py.
+
+A logistic regression over hashed character n-gram TF-IDF features, trained
+on the titles already sorted by Claude into the likely and unlikely feeds
+(their head feed and day shards), leaving out the items settled without
+Claude. Titles the model is very sure about skip the Anthropic call; the
+others are classified as before. The model is not committed: CI caches it
+and trains it again each week.
+
+Usage:
+  python prefilter.py train      # (re)train and save the model
+  python prefilter.py evaluate   # train on 80% of the titles, report on the rest
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import random
+import sys
+import unicodedata
+import xml.etree.ElementTree as ET
+import zlib
+
+from feed_archive import news_archive
+
+MODEL_FILE    = './prefilter_model.json.gz'
+THRESHOLD     = 0.95
+FEATURE_BITS  = 18
+NGRAMS        = (2, 3, 4, 5)
+EPOCHS        = 8
+LEARNING_RATE = 0.5
+L2            = 1e-6
+
+def load_titles(path, skipped_ids=()):
+    titles = []
+    for event, element in ET.iterparse(path):
+        if element.tag == 'item':
+            title = element.findtext('title')
+            if title and element.findtext('guid') not in skipped_ids:
+                titles.append(title)
+            element.clear()
+    return titles
+
+def load_dataset():
+    # The same title can end up in both feeds over time, and the head feeds
+    # repeat the latest shards; keep the first label of each title. Titles
+    # settled by the pre-filter itself (or by the noise-source bypass) are
+    # left out, so it does not learn from its own mistakes.
+    dataset = {}
+    for name, label in (('likely', 1), ('unlikely', 0)):
+        archive = news_archive(name)
+        settled = archive.settled_ids()
+        for path in [archive.head_path] + archive.paths():
+            if os.path.exists(path):
+                for title in load_titles(path, settled):
+                    dataset.setdefault(title, label)
+    return list(dataset.items())
+
+def ngrams(title):
+    text = ' ' + ' '.join(unicodedata.normalize('NFKC', title).casefold().split()) + ' '
+    counts = {}
+    mask = (1 << FEATURE_BITS) - 1
+    for size in NGRAMS:
+        for index in range(len(text) - size + 1):
+            feature = zlib.crc32(text[index:index + size].encode('utf-8')) & mask
+            counts[feature] = counts.get(feature, 0) + 1
+    return counts
+
+class Prefilter:
+    def __init__(self, idf, weights, bias, threshold=THRESHOLD):
+        self.idf       = idf
+        self.weights   = weights
+        self.bias      = bias
+        self.threshold = threshold
+
+    @staticmethod
+    def vectorize(counts, idf):
+        vector = {feature: (1 + math.log(count)) * idf[feature] for feature, count in counts.items() if feature in idf}
+        norm = math.sqrt(sum(value * value for value in vector.values())) or 1
+        return {feature: value / norm for feature, value in vector.items()}
+
+    @classmethod
+    def train(cls, dataset, epochs=EPOCHS):
+        documents = [(ngrams(title), label) for title, label in dataset]
+        frequency = {}
+        for counts, label in documents:
+            for feature in counts:
+                frequency[feature] = frequency.get(feature, 0) + 1
+        # Features seen in a single title carry no signal and bloat the model.
+        idf = {feature: math.log(len(documents) / count) + 1 for feature, count in frequency.items() if count > 1}
+        vectors = [(cls.vectorize(counts, idf), label) for counts, label in documents]
+
+        weights = {}
+        bias    = 0.0
+        rng     = random.Random(0)
+        for epoch in range(epochs):
+            rng.shuffle(vectors)
+            rate = LEARNING_RATE / (1 + epoch)
+            for vector, label in vectors:
+                score = bias + sum(weights.get(feature, 0.0) * value for feature, value in vector.items())
+                error = sigmoid(score) - label
+                bias -= rate * error
+                for feature, value in vector.items():
+                    weight = weights.get(feature, 0.0)
+                    weights[feature] = weight - rate * (error * value + L2 * weight)
+        weights = {feature: weight for feature, weight in weights.items() if abs(weight) > 1e-2}
+        idf     = {feature: value for feature, value in idf.items() if feature in weights}
+        return cls(idf, weights, bias)
+
+    def probability(self, title):
+        vector = self.vectorize(ngrams(title), self.idf)
+        return sigmoid(self.bias + sum(self.weights.get(feature, 0.0) * value for feature, value in vector.items()))
+
+    def verdict(self, title):
+        """Return 'likely' or 'unlikely' when confident enough, None otherwise."""
+        probability = self.probability(title)
+        if probability >= self.threshold:
+            return 'likely'
+        if probability <= 1 - self.threshold:
+            return 'unlikely'
+        return None
+
+    def save(self, path=MODEL_FILE):
+        model = {
+            'feature_bits': FEATURE_BITS,
+            'ngrams': NGRAMS,
+            'bias': round(self.bias, 5),
+            'features': {str(feature): [round(self.idf[feature], 3), round(weight, 5)]
+                         for feature, weight in self.weights.items()},
+        }
+        with gzip.open(path, 'wt', encoding='utf-8') as file:
+            json.dump(model, file, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path=MODEL_FILE, threshold=THRESHOLD):
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            model = json.load(file)
+        if model['feature_bits'] != FEATURE_BITS or tuple(model['ngrams']) != NGRAMS:
+            raise ValueError(f'{path} was trained with different features, retrain it')
+        idf     = {int(feature): values[0] for feature, values in model['features'].items()}
+        weights = {int(feature): values[1] for feature, values in model['features'].items()}
+        return cls(idf, weights, model['bias'], threshold)
+
+def sigmoid(score):
+    if score < -30:
+        return 0.0
+    return 1 / (1 + math.exp(-score))
+
+def is_held_out(title):
+    return zlib.crc32(title.encode('utf-8')) % 5 == 0
+
+def evaluate(dataset, thresholds):
+    training = [(title, label) for title, label in dataset if not is_held_out(title)]
+    held_out = [(title, label) for title, label in dataset if is_held_out(title)]
+    model    = Prefilter.train(training)
+    scored   = [(model.probability(title), label) for title, label in held_out]
+
+    print(f'{len(training)} training titles, {len(held_out)} held-out titles')
+    print(f'{"threshold":>9} {"LLM calls avoided":>18} {"agreement":>10}')
+    for threshold in thresholds:
+        decided = [(probability >= 0.5, label) for probability, label in scored
+                   if probability >= threshold or probability <= 1 - threshold]
+        avoided   = len(decided) / len(scored) if scored else 0
+        agreement = sum(predicted == bool(label) for predicted, label in decided) / len(decided) if decided else 0
+        print(f'{threshold:>9.2f} {avoided:>17.1%} {agreement:>10.1%}')
+
+def main():
+    parser = argparse.ArgumentParser(description='Train or evaluate the likely/unlikely pre-filter.')
+    parser.add_argument('command', choices=['train', 'evaluate'])
+    parser.add_argument('--model', default=MODEL_FILE, help='Model file to write.')
+    parser.add_argument('--thresholds', default='0.8,0.9,0.95,0.97,0.99',
+                        help='Comma-separated confidence thresholds to evaluate.')
+    args = parser.parse_args()
+
+    dataset = load_dataset()
+    if args.command == 'train':
+        model = Prefilter.train(dataset)
+        model.save(args.model)
+        print(f'Trained on {len(dataset)} titles, {len(model.weights)} features saved to {args.model}')
+    else:
+        evaluate(dataset, [float(threshold) for threshold in args.thresholds.split(',')])
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+import threading
+import time
+from urllib.parse import urlsplit
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate     = rate
+        self.capacity = capacity
+        self.tokens   = capacity
+        self.updated  = time.monotonic()
+        self.lock     = threading.Lock()
+
+    def acquire(self, tokens=1):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens  = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+def per_minute(requests, burst=1):
+    return TokenBucket(requests / 60, burst)
+
+class HostLimiter:
+    """One TokenBucket per host, so requests to different sites never wait on each other."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate     = rate
+        self.capacity = capacity
+        self.buckets  = {}
+        self.lock     = threading.Lock()
+
+    def acquire(self, url, tokens=1):
+        host = urlsplit(url).netloc.lower()
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.rate, self.capacity)
+        bucket.acquire(tokens)
+
+def per_host_per_minute(requests, burst=1):
+    return HostLimiter(requests / 60, burst)
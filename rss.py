@@ -2,62 +2,101 @@
 import feedparser
 import requests
 import json
-import base64
+import argparse
 import functools
 import re
 import hashlib
+import io
 import os
+import signal
+import sys
+import threading
 import time
+import unicodedata
 import uuid
-from feedgen.feed import FeedGenerator
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+import xml.etree.ElementTree as ET
 import anthropic
+from rate_limit import per_minute
+from seen_store import SeenStore
+from journal_store import JournalStore
+import feed_writer
+from feed_archive import news_archive
+from news_resolver import GoogleNewsResolver
+from source_stats import SourceStats
+from near_duplicates import NearDuplicateIndex
+from run_report import RunReport
+from prefilter import Prefilter
+from feed_schedule import Deadline, FeedSchedule
+import feed_planner
 
 # Constants
 ATRANS_API_KEY = os.environ['ATRANS_API_KEY']
+TRANSLATOR_ENDPOINT = os.environ.get('ATRANS_ENDPOINT', 'https://api.cognitive.microsofttranslator.com')
 SEEN_ITEMS_FILE = './seen_items.txt'
-
-_ENCODED_URL_PREFIX = 'https://news.google.com/rss/articles/'
-_ENCODED_URL_RE = re.compile(fr'^{re.escape(_ENCODED_URL_PREFIX)}(?P<encoded_url>[^?]+)')
-_DECODED_URL_RE = re.compile(rb'^\x08\x13".+?(?P<primary_url>http[^\xd2]+)\xd2\x01')
+# Rolling head feeds; every item is also kept in a per-day shard under ./archive.
+likely_archive     = news_archive('likely')
+unlikely_archive   = news_archive('unlikely')
+LIKELY_FEED_FILE   = likely_archive.head_path
+UNLIKELY_FEED_FILE = unlikely_archive.head_path
+TRANSLATION_MEMORY_FILE = './translation_memory.jsonl'
+TRANSLATION_MEMORY_DAYS = 90
+VERDICT_CACHE_FILE = './verdict_cache.jsonl'
+VERDICT_CACHE_DAYS = 30
+RUN_JOURNAL_FILE   = './run_journal.jsonl'
+# Google News article ID -> publisher URL.
+LINK_CACHE_FILE    = './google_news_links.jsonl'
+LINK_CACHE_DAYS    = 30
+RESOLVE_LINKS      = os.environ.get('RESOLVE_LINKS', '1') != '0'
+GOOGLE_NEWS_URL    = os.environ.get('GOOGLE_NEWS_URL', 'https://news.google.com')
+NEAR_DUPLICATES_FILE = './near_duplicates.json'
+SOURCE_STATS_FILE  = './source_stats.json'
+PREFILTER_MODEL_FILE = './prefilter_model.json.gz'
+PREFILTER_THRESHOLD  = float(os.environ.get('PREFILTER_THRESHOLD', 0.95))
+RUN_REPORT_FILE    = os.environ.get('RUN_REPORT_FILE', './run_report.json')
+# Optional Prometheus textfile (for node_exporter's textfile collector).
+RUN_REPORT_PROM    = os.environ.get('RUN_REPORT_PROM')
+FEED_TIMEOUT    = 20
+FEED_WORKERS    = 8
+FEED_SCHEDULE_FILE = './feed_schedule.json'
+# Optional wall-clock budget of a run, in seconds. Feeds are not fetched once
+# less than FETCH_RESERVE seconds are left, and titles still unclassified at
+# the deadline are left for the next run.
+RUN_DEADLINE    = int(os.environ.get('RUN_DEADLINE', 0))
+FETCH_RESERVE   = int(os.environ.get('FETCH_RESERVE', 300))
+
+# Worker pools and request rates for the two paid APIs. Throughput is bounded
+# by these rate limits rather than by the latency of each call.
+CLAUDE_WORKERS  = int(os.environ.get('CLAUDE_WORKERS', 4))
+CLAUDE_RPM      = int(os.environ.get('CLAUDE_RPM', 50))
+AZURE_WORKERS   = int(os.environ.get('AZURE_WORKERS', 4))
+AZURE_RPM       = int(os.environ.get('AZURE_RPM', 300))
+GOOGLE_WORKERS  = int(os.environ.get('GOOGLE_WORKERS', 4))
+GOOGLE_RPM      = int(os.environ.get('GOOGLE_RPM', 120))
+
+claude_limiter  = per_minute(CLAUDE_RPM)
+azure_limiter   = per_minute(AZURE_RPM)
+google_limiter  = per_minute(GOOGLE_RPM, burst=GOOGLE_WORKERS)
+
+report = RunReport()
+deadline = Deadline(RUN_DEADLINE)
+
+# One connection pool per host, reused by every request of the process.
+session = requests.Session()
+session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=max(FEED_WORKERS, AZURE_WORKERS)))
 
 # List of RSS feeds
-rss_feed_urls_en = [
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+cyber+attack&scoring=n&hl=en-CA&gl=CA&ceid=CA:en',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+cyber+attack&scoring=n&hl=en-US&gl=US&ceid=US:en',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+cyber+attack&scoring=n&hl=en-IN&gl=IN&ceid=IN:en',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+cyber+attack&scoring=n&hl=en-AU&gl=AU&ceid=AU:en',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+cyber+attack&scoring=n&hl=en-GB&gl=GB&ceid=GB:en',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+cyber+attack&scoring=n&hl=en-NZ&gl=NZ&ceid=NZ:en',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+cyber+attack&scoring=n&hl=en-ZA&gl=ZA&ceid=ZA:en',
-]
-
-rss_feed_urls_others = [
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+attaque+informatique&scoring=n&hl=fr-FR&gl=FR&ceid=FR:fr',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+cyber+attaque&scoring=n&hl=fr-FR&gl=FR&ceid=FR:fr',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+cyber+attaque&scoring=n&hl=fr-BE&gl=BE&ceid=BE:fr',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+cyber+attaque&scoring=n&hl=fr-CH&gl=CH&ceid=CH:fr',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+cyber+angriff&scoring=n&hl=de-CH&gl=CH&ceid=CH:de',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+cyber+angriff&scoring=n&hl=de-DE&gl=DE&ceid=DE:de',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+cyber+angriff&scoring=n&hl=de-AT&gl=AT&ceid=AT:de',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+ataque+cibernetico&scoring=n&hl=es-ES&gl=ES&ceid=ES:es',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+ataque+cibernetico&scoring=n&hl=es-MX&gl=MX&ceid=MX:es',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+ataque+cibernetico&scoring=n&hl=es-CL&gl=CL&ceid=CL:es',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+ataque+cibernetico&scoring=n&hl=pt-PT&gl=PT&ceid=PR:pt',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+ataque+cibernetico&scoring=n&hl=pt-BR&gl=BR&ceid=BR:pt',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+attacco+informatico&scoring=n&hl=it&gl=IT&ceid=IT:it',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+cyberaanval&scoring=n&hl=nl&gl=NL&ceid=NL:nl',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+cyberangreb&scoring=n&hl=dk&gl=DK&ceid=DK:dk',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+verkkohy%C3%B6kk%C3%A4ys&scoring=n&hl=fi&gl=FI&ceid=FI:fi',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+cyberattack&scoring=n&hl=se&gl=SE&ceid=SE:se',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+cyberangrep&scoring=n&hl=no&gl=NO&ceid=NO:no',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+q=%E3%82%B5%E3%82%A4%E3%83%90%E3%83%BC%E6%94%BB%E6%92%83&scoring=n&gl=JP&hl=ja&ceid=JP:ja',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+%E7%BD%91%E7%BB%9C%E6%94%BB%E5%87%BB&scoring=n&hl=zh-CN&gl=CN&ceid=CN:zh-Hans',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+%E7%BD%91%E7%BB%9C%E6%94%BB%E5%87%BB&scoring=n&hl=zh-TW&gl=TW&ceid=TW:zh-Hant',
-    'https://news.google.com/rss/search?tbm=nws&q=when:12h+%E7%BD%91%E7%BB%9C%E6%94%BB%E5%87%BB&scoring=n&hl=zh-HK&gl=HK&ceid=HK:zh-Hant'
-]
-
-ignored_sources = [
+# The feed URLs are planned from the search terms and locales declared in
+# feed_planner.py, merging the terms of each locale into one query.
+feed_plan = feed_planner.plan(feed_planner.load_results(FEED_SCHEDULE_FILE))
+rss_feed_urls_en     = [url for url, english in feed_plan if english]
+rss_feed_urls_others = [url for url, english in feed_plan if not english]
+
+# Sources that are never kept; sources that turn out to be noise are also
+# bypassed automatically (see source_stats.py).
+ignored_sources = {
     'GlobeNewswire',
     'PR Newswire UK',
     'PR Newswire Asia',
@@ -73,10 +112,27 @@ ignored_sources = [
     'TechTargetジャパン',
     'TEISS',
     'Smartphone Magazine',
-]
-
-def atranslate(text):
-    endpoint = "https://api.cognitive.microsofttranslator.com"
+}
+
+# Translator v3 limits for a single request.
+TRANSLATE_MAX_ELEMENTS = 100
+TRANSLATE_MAX_CHARS    = 10000
+
+def translation_batches(texts):
+    batch = []
+    chars = 0
+    for index, text in enumerate(texts):
+        if batch and (len(batch) == TRANSLATE_MAX_ELEMENTS or chars + len(text) > TRANSLATE_MAX_CHARS):
+            yield batch
+            batch = []
+            chars = 0
+        batch.append(index)
+        chars += len(text)
+    if batch:
+        yield batch
+
+def atranslate_request(texts):
+    endpoint = TRANSLATOR_ENDPOINT
     location = "centralus"
     path = "/translate"
     constructed_url = endpoint + path
@@ -94,64 +150,351 @@ def atranslate(text):
         "X-ClientTraceId": str(uuid.uuid4())
     }
 
-    # You can pass more than one object in body.
-    body = [{
-        "text": text
-    }]
-
-    request    = requests.post(constructed_url, params=params, headers=headers, json=body)
-    response   = request.json()
-    result     = response[0]["translations"][0]["text"]
-    print(text)
-    print(result)
-    return result
-
-def decode_google_news_url(url):
-    print(url)
-    match = _ENCODED_URL_RE.match(url)
-    encoded_text = match.groupdict()['encoded_url']  # type: ignore
-    encoded_text += '==='  # Fix incorrect padding. Ref: https://stackoverflow.com/a/49459036/
-    decoded_text = base64.urlsafe_b64decode(encoded_text)
-
-    match = _DECODED_URL_RE.match(decoded_text)
-    primary_url = match.groupdict()['primary_url']  # type: ignore
-    primary_url = primary_url.decode()
-    return primary_url
+    body = [{"text": text} for text in texts]
+
+    azure_limiter.acquire()
+    report.count('azure_calls')
+    report.count('azure_characters', sum(len(text) for text in texts))
+    try:
+        request  = session.post(constructed_url, params=params, headers=headers, json=body, timeout=30)
+        request.raise_for_status()
+        response = request.json()
+    except (requests.RequestException, ValueError) as e:
+        print(f'Error translating {len(texts)} titles: {e}')
+        report.count('azure_errors')
+        return list(texts)
+
+    # Translator returns one result per input element, in the same order.
+    return [item["translations"][0]["text"] for item in response]
+
+def atranslate_batch(texts, on_result=None):
+    # Titles that cannot be translated are kept as they are. on_result(index,
+    # translation) is called as soon as the batch of a title comes back.
+    results = list(texts)
+    batches = list(translation_batches(texts))
+    with ThreadPoolExecutor(max_workers=AZURE_WORKERS) as executor:
+        futures = {executor.submit(atranslate_request, [texts[index] for index in batch]): batch for batch in batches}
+        for future in as_completed(futures):
+            for index, result in zip(futures[future], future.result()):
+                results[index] = result
+                print(texts[index])
+                print(result)
+                if on_result:
+                    on_result(index, result)
+    return results
+
+def atranslate(text):
+    return atranslate_batch([text])[0]
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+# Function words used to tell English titles from the other feed languages.
+_ENGLISH_WORDS = {'the', 'of', 'and', 'with', 'after', 'for', 'from', 'by', 'is', 'are',
+                  'was', 'were', 'has', 'have', 'its', 'says', 'over', 'into', 'amid',
+                  'hit', 'hits', 'targets', 'attack', 'attacks', 'breach'}
+_FOREIGN_WORDS = {'de', 'la', 'le', 'les', 'des', 'du', 'une', 'pour', 'sur', 'der', 'die',
+                  'das', 'und', 'mit', 'auf', 'el', 'los', 'las', 'del', 'con', 'il', 'di',
+                  'della', 'per', 'het', 'een', 'van', 'och', 'og', 'em', 'do', 'da', 'na'}
+
+def normalize_title(title):
+    title = unicodedata.normalize('NFKC', title).casefold()
+    return ' '.join(title.split())
+
+def looks_english(title):
+    words = _WORD_RE.findall(normalize_title(title))
+    if not words or not all(word.isascii() for word in words):
+        return False
+    english = sum(word in _ENGLISH_WORDS for word in words)
+    foreign = sum(word in _FOREIGN_WORDS for word in words)
+    return english >= 2 and english > foreign
+
+def translate_titles(titles, english, memory):
+    results  = list(titles)
+    pending  = []
+    skipped  = 0
+    cached   = 0
+    for index, title in enumerate(titles):
+        if english[index] or looks_english(title):
+            skipped += 1
+            continue
+        translation = memory.get(get_item_hash(normalize_title(title)))
+        if translation is not None:
+            results[index] = translation
+            cached += 1
+            continue
+        pending.append(index)
+
+    # Translations are journaled batch by batch, so an interrupted run does
+    # not pay for them again.
+    def remember(position, translation):
+        index = pending[position]
+        results[index] = translation
+        # Failed translations come back unchanged and are not remembered.
+        if translation != titles[index]:
+            memory.put(get_item_hash(normalize_title(titles[index])), translation)
+
+    atranslate_batch([titles[index] for index in pending], remember)
+
+    report.count('translations_skipped_english', skipped)
+    report.count('translations_from_memory', cached)
+    print(f'Translations: {skipped} already in English, {cached} from memory, {len(pending)} sent to Azure.')
+    return results
+
+def feed_label(url):
+    query = parse_qs(urlsplit(url).query)
+    return f"{query.get('q', [''])[0]} {query.get('hl', [''])[0]}"
+
+def read_body(response, timeout):
+    # The requests timeout applies to each read, so a server trickling bytes
+    # could otherwise hold a worker forever.
+    start  = time.perf_counter()
+    chunks = []
+    for chunk in response.iter_content(65536):
+        chunks.append(chunk)
+        if time.perf_counter() - start > timeout:
+            raise requests.Timeout(f'Feed not received within {timeout:.0f}s')
+    return b''.join(chunks)
+
+def text_of(item, tag):
+    return (item.findtext(tag) or '').strip()
+
+def parse_feed(content, known_guids=()):
+    # Google News lists the newest items first, so everything after the first
+    # GUID already handled by an earlier run is old: stop parsing there.
+    # Entries have the same fields as feedparser's.
+    entries = []
+    for event, element in ET.iterparse(io.BytesIO(content)):
+        if element.tag != 'item':
+            continue
+        guid = text_of(element, 'guid') or text_of(element, 'link')
+        if guid in known_guids:
+            break
+        source = element.find('source')
+        entries.append(feedparser.FeedParserDict(
+            title=text_of(element, 'title'),
+            link=text_of(element, 'link'),
+            id=guid,
+            published=text_of(element, 'pubDate'),
+            source=feedparser.FeedParserDict(
+                title=(source.text or '').strip() if source is not None else '',
+                href=source.get('url', '') if source is not None else ''),
+        ))
+        element.clear()
+    return entries
+
+def fetch_feed(url, schedule=None):
+    # Returns None when the feed was not fetched because the run is out of time.
+    if deadline.expired(FETCH_RESERVE):
+        report.count('feeds_skipped_deadline')
+        return None
+    timeout = min(FEED_TIMEOUT, deadline.remaining() - FETCH_RESERVE)
+    etag, last_modified = schedule.validators(url) if schedule else (None, None)
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    start = time.perf_counter()
+    try:
+        with session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            content = read_body(response, timeout)
+    except requests.RequestException as e:
+        print(f'Error fetching {url}: {e}')
+        report.feed(feed_label(url), time.perf_counter() - start, 0, str(e))
+        return []
+    if response.status_code == 304:
+        report.count('feeds_not_modified')
+        report.feed(feed_label(url), time.perf_counter() - start, 0)
+        return []
+    if schedule:
+        schedule.observe(url, content.count(b'<item>'))
+    try:
+        entries = parse_feed(content, schedule.known_guids(url) if schedule else ())
+    except ET.ParseError as e:
+        # feedparser copes with malformed documents; parse them in full.
+        print(f'Error parsing {url}: {e}')
+        entries = feedparser.parse(content).entries
+    if schedule:
+        schedule.fetched(url, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                         [entry.id for entry in entries])
+    report.feed(feed_label(url), time.perf_counter() - start, len(entries))
+    return entries
+
+def fetch_feeds(urls, schedule=None):
+    # All feeds are fetched in parallel, in the order given; the results are
+    # keyed by URL so callers keep the same entry order as with sequential
+    # fetching.
+    with ThreadPoolExecutor(max_workers=FEED_WORKERS) as executor:
+        results = executor.map(fetch_feed, urls, [schedule] * len(urls))
+        return dict(zip(urls, results))
 
 def get_item_hash(item):
     return hashlib.md5(item.encode('utf-8')).hexdigest()
 
-def is_item_seen(item_hash):
-    try:
-        with open(SEEN_ITEMS_FILE, 'r') as file:
-            return item_hash in file.read()
-    except FileNotFoundError:
-        return False
+CLAUDE_MODEL      = 'claude-sonnet-4-6'
+# Bump whenever the classification prompt changes, so cached verdicts are not reused.
+PROMPT_VERSION    = 1
+CLAUDE_BATCH_SIZE = int(os.environ.get('CLAUDE_BATCH_SIZE', 25))
+VERDICTS          = ('likely', 'unlikely', 'no')
+
+def claude_system_prompt():
+    today = datetime.now()
+    return ("Tu es un journaliste technique, spécialisé dans l\'informatique professionnelle, et en particulier la cybersécurité."
+            "Ta mission consiste à produire une revue de presse des cyberattaques rapportées à travers le monde, dans les médias."
+            "Tu dois évaluer des titres d'articles et dire si, selon toi, le titre suggère que l'article parle vraisemblement d'une véritable cyberattaque (qu'elle soit avérée ou soupçonnée) ou pas, et surtout pas une statistique, un produit, ni une étude de marché."
+            "Pour chaque titre évalué, tu ne peux répondre que par “likely”, “unlikely”, “no”."
+            "Date d\'aujourd\'hui: " + today.strftime('%Y-%m-%d') + ".")
 
-def mark_item_seen(item_hash):
-    with open(SEEN_ITEMS_FILE, 'a') as file:
-        file.write(item_hash + '\n')
+_claude_client = None
+
+def claude_client():
+    global _claude_client
+    if _claude_client is None:
+        _claude_client = anthropic.Anthropic()
+    return _claude_client
+
+def count_claude_usage(response):
+    report.count('anthropic_calls')
+    report.count('anthropic_input_tokens', response.usage.input_tokens)
+    report.count('anthropic_output_tokens', response.usage.output_tokens)
+
+# Latency of the single-title requests, used to estimate the time batching saves.
+single_call_seconds = []
 
 def ask_claude(news_title):
-    client = anthropic.Anthropic()
-    today  = datetime.now()
-    system = ("Tu es un journaliste technique, spécialisé dans l\'informatique professionnelle, et en particulier la cybersécurité."
-              "Ta mission consiste à produire une revue de presse des cyberattaques rapportées à travers le monde, dans les médias."
-              "Tu dois évaluer des titres d'articles et dire si, selon toi, le titre suggère que l'article parle vraisemblement d'une véritable cyberattaque (qu'elle soit avérée ou soupçonnée) ou pas, et surtout pas une statistique, un produit, ni une étude de marché."
-              "Pour chaque titre évalué, tu ne peux répondre que par “likely”, “unlikely”, “no”."
-              "Date d\'aujourd\'hui: " + today.strftime('%Y-%m-%d') + ".")
+    client = claude_client()
+    system = claude_system_prompt()
 
+    claude_limiter.acquire()
+    started  = time.monotonic()
     response = client.messages.create(
-        model='claude-sonnet-4-6',
+        model=CLAUDE_MODEL,
         max_tokens=10,
         system=system,
         messages=[{'role': 'user', 'content': news_title}]
     )
-    time.sleep(1)
+    single_call_seconds.append(time.monotonic() - started)
+    count_claude_usage(response)
     assessment = response.content[0].text
 
     return assessment
 
+def parse_batch_assessment(text, count):
+    # Only well-formed {"index": i, "verdict": v} objects are kept; anything
+    # else is left out and classified again one title at a time.
+    verdicts = {}
+    start = text.find('[')
+    end   = text.rfind(']')
+    if start == -1 or end < start:
+        return verdicts
+    try:
+        items = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return verdicts
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        index   = item.get('index')
+        verdict = str(item.get('verdict', '')).strip().lower()
+        if isinstance(index, int) and 0 <= index < count and verdict in VERDICTS:
+            verdicts[index] = verdict
+    return verdicts
+
+def ask_claude_batch(news_titles):
+    client = claude_client()
+    system = (claude_system_prompt() +
+              "Tu reçois une liste de titres numérotés. Réponds uniquement par un tableau JSON, "
+              "avec un objet par titre: [{\"index\": 0, \"verdict\": \"likely\"}, ...].")
+    content = '\n'.join(f'{index}. {title}' for index, title in enumerate(news_titles))
+
+    claude_limiter.acquire()
+    response = client.messages.create(
+        model=CLAUDE_MODEL,
+        max_tokens=20 * len(news_titles) + 50,
+        system=system,
+        messages=[{'role': 'user', 'content': content}]
+    )
+    count_claude_usage(response)
+
+    return parse_batch_assessment(response.content[0].text, len(news_titles))
+
+def verdict_key(news_title):
+    return f'{CLAUDE_MODEL}:{PROMPT_VERSION}:{get_item_hash(news_title)}'
+
+def classify_batch(news_titles):
+    # None means the batch was not sent because the run is out of time.
+    if deadline.expired():
+        return None
+    try:
+        return ask_claude_batch(news_titles)
+    except anthropic.APIError as e:
+        print(f'Batch classification failed: {e}')
+        return {}
+
+def classify_title(news_title):
+    if deadline.expired():
+        return None
+    return ask_claude(news_title).strip().lower()
+
+def classify_titles(news_titles, verdict_cache, batch_size=CLAUDE_BATCH_SIZE):
+    assessments = [verdict_cache.get(verdict_key(title)) for title in news_titles]
+    pending     = [index for index, assessment in enumerate(assessments) if assessment is None]
+    cached      = len(news_titles) - len(pending)
+    calls       = 0
+    start       = time.time()
+    single_call_seconds.clear()
+
+    # Verdicts are journaled as soon as they come back, so an interrupted run
+    # does not pay for them again.
+    with ThreadPoolExecutor(max_workers=CLAUDE_WORKERS) as executor:
+        if batch_size > 1:
+            batches = [pending[offset:offset + batch_size] for offset in range(0, len(pending), batch_size)]
+            futures = {executor.submit(classify_batch, [news_titles[index] for index in batch]): batch
+                       for batch in batches}
+            for future in as_completed(futures):
+                batch    = futures[future]
+                verdicts = future.result()
+                if verdicts is None:
+                    continue
+                calls += 1
+                for index, verdict in verdicts.items():
+                    assessments[batch[index]] = verdict
+                    verdict_cache.put(verdict_key(news_titles[batch[index]]), verdict)
+
+        missing   = [index for index in pending if assessments[index] is None] if not deadline.expired() else []
+        fallbacks = len(missing) if batch_size > 1 else 0
+        futures   = {executor.submit(classify_title, news_titles[index]): index for index in missing}
+        for future in as_completed(futures):
+            index   = futures[future]
+            verdict = future.result()
+            if verdict is None:
+                continue
+            calls += 1
+            assessments[index] = verdict
+            verdict_cache.put(verdict_key(news_titles[index]), verdict)
+
+    unclassified = sum(assessment is None for assessment in assessments)
+    report.count('verdicts_cached', cached)
+    report.count('classify_fallbacks', fallbacks)
+    report.count('deadline_unclassified', unclassified)
+    if news_titles:
+        classified = len(news_titles) - unclassified
+        elapsed    = time.time() - start
+        # One call per title, one after the other: each call takes at least the
+        # rate limiter's interval, or a single-title request when some were timed.
+        per_call   = 60 / CLAUDE_RPM
+        if single_call_seconds:
+            per_call = max(per_call, sum(single_call_seconds) / len(single_call_seconds))
+        saved_seconds = max(0, classified * per_call - elapsed)
+        report.count('classify_seconds_saved', round(saved_seconds))
+        print(f'Classified {classified} titles with {calls} Anthropic calls '
+              f'({cached} cached, {fallbacks} single-title fallbacks) in {elapsed:.1f}s; '
+              f'saved {classified - calls} calls and about {saved_seconds:.0f}s.')
+    if unclassified:
+        print(f'Deadline reached: {unclassified} titles left for the next run.')
+    return assessments
+
 def extract_title(input_string):
     index_dash = input_string.find(" - ")
     index_pipe = input_string.find(" | ")
@@ -171,134 +514,302 @@ def extract_title(input_string):
         result = input_string
     return(result)
 
-def main():
-    entries = []
-    unique_ids = set()
-
-    fg = FeedGenerator()
-    fg.id('https://raw.githubusercontent.com/Casualtek/Cyberwatch/main/cyberattacks_news.xml')
-    fg.title('Cyberattacks News')
-    fg.author( {'name':'Valéry Marchive','email':'valery@casualtek.com'} )
-    fg.language('en')
-    fg.link( href='https://www.lemagit.fr', rel='self')
-    fg.description('Aggregated and Translated Likely Cyberattacks News Feed')
-
-    fgnot = FeedGenerator()
-    fgnot.id('https://raw.githubusercontent.com/Casualtek/Cyberwatch/main/unlikely_cyberattacks_news.xml')
-    fgnot.title('Cyberattacks News (low likeliness)')
-    fgnot.author( {'name':'Valéry Marchive','email':'valery@casualtek.com'} )
-    fgnot.language('en')
-    fgnot.link( href='https://www.lemagit.fr', rel='self')
-    fgnot.description('Aggregated and Translated Unlikely Cyberattacks News Feed')
-
-    print('Getting existing entries (likely).')
-    existing_entries = feedparser.parse('./cyberattacks_news.xml')
-    for entry in existing_entries.entries:
-        fe = fg.add_entry()
-        fe.id(entry.id)
-        fe.title(entry.title)
-        fe.link( href=f'{entry.id}', rel='self')
-        fe.pubDate(entry.published)
-
-    print('Getting existing entries (unlikely).')
-    existing_entries = feedparser.parse('./unlikely_cyberattacks_news.xml')
-    for entry in existing_entries.entries:
-        fe = fgnot.add_entry()
-        fe.id(entry.id)
-        fe.title(entry.title)
-        fe.link( href=f'{entry.id}', rel='self')
-        fe.pubDate(entry.published)
-
-    print('Getting English entries.')
-    for rss_feed_url in rss_feed_urls_en:
-        feed = feedparser.parse(rss_feed_url)
-        entries += feed.entries
-
+def filter_new_entries(entries, seen_items, english):
+    new_entries = []
     for entry in entries:
         source    = entry.source['title']
         realTitle = extract_title(entry.title)
         item_hash = get_item_hash(realTitle)
 
-        if (is_item_seen(item_hash) or (source in ignored_sources)):
+        report.count('entries_fetched')
+        if item_hash in seen_items:
+            report.count('seen')
             continue
-        mark_item_seen(item_hash)
-
-#        link  = decode_google_news_url(entry.link)
-        date  = entry.published
-
-        assessment = ask_claude(realTitle)
-        assessment = assessment.lower()
+        if source in ignored_sources:
+            report.count('ignored_source')
+            continue
+        seen_items.add(item_hash)
+        new_entries.append((entry, realTitle, english))
+    return new_entries
+
+def link_hash(link):
+    return get_item_hash('url:' + link)
+
+def resolve_links(new_entries, resolver, seen_items):
+    # Entries get the publisher's URL as canonical_link; an article already
+    # published under another title (e.g. by another locale) is dropped.
+    canonical = resolver.resolve([entry.link for entry, realTitle, english in new_entries])
+    report.count('links_resolved', resolver.resolved)
+    report.count('links_cached', resolver.cached)
+    report.count('links_unresolved', resolver.failed)
+    kept = []
+    for entry, realTitle, english in new_entries:
+        link = canonical.get(entry.link)
+        if link:
+            entry['canonical_link'] = link
+            if link_hash(link) in seen_items:
+                report.count('seen_url')
+                continue
+            seen_items.add(link_hash(link))
+        kept.append((entry, realTitle, english))
+    print(f'Resolved {len(canonical)} of {len(new_entries)} links ({resolver.cached} cached); '
+          f'dropped {len(new_entries) - len(kept)} already seen.')
+    return kept
+
+def suppress_near_duplicates(new_entries, near_duplicates):
+    # Titles close to one already classified (in an earlier run or earlier in
+    # this one) inherit its verdict and are not classified, translated or
+    # published again.
+    # Duplicates of a title of this run are listed on its entry, so they are
+    # retried with it if it is left unclassified.
+    kept       = []
+    inherited  = {}
+    originals  = {}
+    for entry, realTitle, english in new_entries:
+        match = near_duplicates.match(realTitle)
+        if match is not None:
+            verdict = near_duplicates.titles[match][0]
+            inherited[verdict] = inherited.get(verdict, 0) + 1
+            report.count('near_duplicate')
+            if match in originals:
+                originals[match].setdefault('near_duplicates', []).append((entry, realTitle))
+            continue
+        originals[near_duplicates.add(realTitle, 'pending')] = entry
+        kept.append((entry, realTitle, english))
+    if inherited:
+        print(f'Suppressed {sum(inherited.values())} near-duplicate titles: {inherited}')
+    return kept
+
+def bypass_noise_sources(new_entries, assessments, source_stats):
+    # Entries from sources that are almost never likely go to the unlikely
+    # feed without being classified, except for a resampled share.
+    bypassed = set()
+    for index, (entry, realTitle, english) in enumerate(new_entries):
+        if assessments[index] is None and source_stats.bypass(entry.source['title'], realTitle):
+            assessments[index] = 'unlikely'
+            bypassed.add(index)
+    report.count('source_bypassed', len(bypassed))
+    return bypassed
+
+def prefilter_titles(titles):
+    if not os.path.exists(PREFILTER_MODEL_FILE):
+        return [None] * len(titles)
+    prefilter   = Prefilter.load(PREFILTER_MODEL_FILE, PREFILTER_THRESHOLD)
+    assessments = [prefilter.verdict(title) for title in titles]
+    report.count('prefilter_settled', sum(assessment is not None for assessment in assessments))
+    return assessments
+
+def write_feed(archive, items, settled):
+    # Only today's shard, the head feed and the manifest are written; items
+    # older than the head window are dropped from the head in the same pass.
+    report.count('items_expired', archive.add(items, settled))
+    report.count('shards_expired', archive.expire())
+
+class PipelineState:
+    """Stores loaded once per process and shared by all of its runs."""
+
+    def __init__(self):
+        self.schedule           = FeedSchedule(FEED_SCHEDULE_FILE)
+        self.seen_items         = SeenStore(SEEN_ITEMS_FILE)
+        self.translation_memory = JournalStore(TRANSLATION_MEMORY_FILE, TRANSLATION_MEMORY_DAYS)
+        self.verdict_cache      = JournalStore(VERDICT_CACHE_FILE, VERDICT_CACHE_DAYS)
+        self.run_journal        = JournalStore(RUN_JOURNAL_FILE, VERDICT_CACHE_DAYS)
+        self.near_duplicates    = NearDuplicateIndex(NEAR_DUPLICATES_FILE)
+        self.source_stats       = SourceStats(SOURCE_STATS_FILE)
+        self.link_cache         = JournalStore(LINK_CACHE_FILE, LINK_CACHE_DAYS)
+        self.resolver           = GoogleNewsResolver(self.link_cache, GOOGLE_NEWS_URL, session,
+                                                     google_limiter, GOOGLE_WORKERS, deadline=deadline)
+
+    def close(self):
+        self.link_cache.close()
+        self.translation_memory.close()
+        self.verdict_cache.close()
+        self.run_journal.close()
+
+def run(state):
+    report.reset()
+    deadline.start()
+    schedule           = state.schedule
+    seen_items         = state.seen_items
+    translation_memory = state.translation_memory
+    verdict_cache      = state.verdict_cache
+    run_journal        = state.run_journal
+    near_duplicates    = state.near_duplicates
+
+    likely_items     = []
+    unlikely_items   = []
+    # IDs of the items settled without Claude; they are kept out of the
+    # pre-filter's training set.
+    likely_settled   = {}
+    unlikely_settled = {}
+
+    # Entries classified by a run that died before writing the feeds.
+    if len(run_journal):
+        print(f'Replaying {len(run_journal)} entries from an interrupted run.')
+        unique_ids = likely_archive.ids() | unlikely_archive.ids()
+        for item_hash, item in run_journal.entries():
+            seen_items.add(item_hash)
+            if item['id'] in unique_ids:
+                continue
+            unique_ids.add(item['id'])
+            item_xml = feed_writer.format_item(item['title'], item['id'], item['date'])
+            (likely_items if item['verdict'] == 'likely' else unlikely_items).append(item_xml)
+            if item.get('settled_by'):
+                (likely_settled if item['verdict'] == 'likely' else unlikely_settled)[item['id']] = item['settled_by']
+
+    # The most productive feeds are fetched, and their entries classified,
+    # first; when the last run was short on time, low-yield feeds are polled
+    # less often.
+    urls = [url for url in schedule.order(rss_feed_urls_en + rss_feed_urls_others) if schedule.due(url)]
+    report.count('feeds_not_due', len(rss_feed_urls_en) + len(rss_feed_urls_others) - len(urls))
+    print(f'Fetching {len(urls)} news feeds.')
+    with report.stage('fetch'):
+        feeds = fetch_feeds(urls, schedule)
+    fetched = [url for url in urls if feeds[url] is not None]
+
+    with report.stage('dedup'):
+        print('Getting new entries.')
+        new_entries = []
+        origins     = {}
+        for url in fetched:
+            entries = filter_new_entries(feeds[url], seen_items, url in rss_feed_urls_en)
+            origins.update((entry.link, url) for entry, realTitle, english in entries)
+            new_entries += entries
+
+    if RESOLVE_LINKS:
+        with report.stage('resolve'):
+            new_entries = resolve_links(new_entries, state.resolver, seen_items)
+
+    with report.stage('dedup'):
+        new_entries = suppress_near_duplicates(new_entries, near_duplicates)
+
+    # Titles are translated first so that the local pre-filter, trained on the
+    # English titles of our own feeds, can settle the obvious ones; only the
+    # uncertain titles are sent to Anthropic.
+    print(f'Translating {len(new_entries)} new entries.')
+    with report.stage('translate'):
+        titles = translate_titles([realTitle for entry, realTitle, english in new_entries],
+                                  [english for entry, realTitle, english in new_entries],
+                                  translation_memory)
+
+    with report.stage('classify'):
+        assessments = prefilter_titles(titles)
+        settled_by  = ['prefilter' if assessment is not None else None for assessment in assessments]
+        bypassed    = bypass_noise_sources(new_entries, assessments, state.source_stats)
+        for index in bypassed:
+            settled_by[index] = 'source'
+        pending     = [index for index, assessment in enumerate(assessments) if assessment is None]
+        print(f'Classifying {len(pending)} new entries ({len(new_entries) - len(pending) - len(bypassed)} settled '
+              f'by the pre-filter, {len(bypassed)} from noise sources).')
+        verdicts    = classify_titles([new_entries[index][1] for index in pending], verdict_cache)
+        for index, verdict in zip(pending, verdicts):
+            assessments[index] = verdict
+
+    # Titles left unclassified by the deadline are forgotten, so the next run
+    # picks them up again.
+    classified = []
+    unfinished = set()
+    for index, ((entry, realTitle, english), assessment, title, settled) in enumerate(zip(new_entries, assessments,
+                                                                                           titles, settled_by)):
+        # Only Claude's verdicts feed the source statistics, so the bypass
+        # is not built on the pre-filter's guesses.
+        if assessment is not None and settled is None:
+            state.source_stats.record(entry.source['title'], assessment == 'likely')
+        if assessment is None:
+            for unseen, unseenTitle in [(entry, realTitle)] + entry.get('near_duplicates', []):
+                seen_items.discard(get_item_hash(unseenTitle))
+                if 'canonical_link' in unseen:
+                    seen_items.discard(link_hash(unseen['canonical_link']))
+                unfinished.add(origins[unseen.link])
+            near_duplicates.discard(realTitle)
+            continue
+        near_duplicates.add(realTitle, assessment)
+        classified.append(((entry, realTitle, english), assessment, title, settled))
 
+    likely_yield = dict.fromkeys(fetched, 0)
+    for (entry, realTitle, english), assessment, title, settled in classified:
         if assessment == 'likely':
-            title = atranslate(realTitle)
-#            link  = decode_google_news_url(entry.link)
-            link = entry.link
-            date  = entry.published
-
-            fe = fg.add_entry()
-            fe.id(link)
-            fe.title(str(title))
-            fe.link( href=f'{link}', rel='self')
-            fe.pubDate(date)
-        else:
-            title = atranslate(realTitle)
-#            link  = decode_google_news_url(entry.link)
-            link = entry.link
-            date  = entry.published
-
-            fe = fgnot.add_entry()
-            fe.id(link)
-            fe.title(str(title))
-            fe.link( href=f'{link}', rel='self')
-            fe.pubDate(date)
-
-    print('Getting non-English entries.')
-    entries = []
-    for rss_feed_url in rss_feed_urls_others:
-        feed = feedparser.parse(rss_feed_url)
-        entries += feed.entries
-
-    for entry in entries:
-        source    = entry.source['title']
-        realTitle = extract_title(entry.title)
-        item_hash = get_item_hash(realTitle)
-
-        if (is_item_seen(item_hash) or (source in ignored_sources)):
-            continue
-        mark_item_seen(item_hash)
-        
-        assessment = ask_claude(realTitle)
-        assessment = assessment.lower()
-#        print(f'{realTitle}: {assessment}')
+            likely_yield[origins[entry.link]] += 1
+    for url, likely in likely_yield.items():
+        schedule.record(url, likely)
+        # Feeds with entries left for the next run keep their previous
+        # watermark, so those entries are fetched and parsed again.
+        if url not in unfinished:
+            schedule.advance(url)
+
+    for (entry, realTitle, english), assessment, title, settled in classified:
+        link = entry.get('canonical_link', entry.link)
+        date  = entry.published
 
+        run_journal.put(get_item_hash(realTitle), {'id': link, 'title': str(title), 'date': date, 'verdict': assessment,
+                                                   'settled_by': settled})
         if assessment == 'likely':
-            title = atranslate(realTitle)
-#            link  = decode_google_news_url(entry.link)
-            link = entry.link
-            date  = entry.published
-
-            fe = fg.add_entry()
-            fe.id(link)
-            fe.title(str(title))
-            fe.link( href=f'{link}', rel='self')
-            fe.pubDate(date)
+            likely_items.append(feed_writer.format_item(title, link, date))
         else:
-            title = atranslate(realTitle)
-#            link  = decode_google_news_url(entry.link)
-            link = entry.link
-            date  = entry.published
-
-            fe = fgnot.add_entry()
-            fe.id(link)
-            fe.title(str(title))
-            fe.link( href=f'{link}', rel='self')
-            fe.pubDate(date)
-
-    # Save the output to a file
-    fg.rss_str(pretty=True)
-    fg.rss_file('./cyberattacks_news.xml')
-    fgnot.rss_str(pretty=True)
-    fgnot.rss_file('./unlikely_cyberattacks_news.xml')
+            unlikely_items.append(feed_writer.format_item(title, link, date))
+        if settled:
+            (likely_settled if assessment == 'likely' else unlikely_settled)[link] = settled
+
+    # Only the new items are spliced into the existing feeds.
+    with report.stage('write'):
+        write_feed(likely_archive, likely_items, likely_settled)
+        write_feed(unlikely_archive, unlikely_items, unlikely_settled)
+        seen_items.flush()
+        translation_memory.compact()
+        state.link_cache.compact()
+        verdict_cache.compact()
+        near_duplicates.save()
+        state.source_stats.save()
+        run_journal.clear()
+        schedule.save(time.time() - report.started, RUN_DEADLINE)
+
+    report.feed_items('likely', len(likely_items), feed_writer.count_items(LIKELY_FEED_FILE))
+    report.feed_items('unlikely', len(unlikely_items), feed_writer.count_items(UNLIKELY_FEED_FILE))
+    report.write(RUN_REPORT_FILE, RUN_REPORT_PROM)
+
+def daemon(interval):
+    # SIGTERM or SIGINT makes the current run wrap up as if its deadline had
+    # passed; the state is then flushed and the process exits.
+    stop = threading.Event()
+    def shutdown(signum, frame):
+        print(f'Received {signal.Signals(signum).name}, shutting down.')
+        stop.set()
+        deadline.expire()
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    state = PipelineState()
+    try:
+        while not stop.is_set():
+            started = time.monotonic()
+            try:
+                run(state)
+            except Exception as e:
+                # Start over from what was saved, as a new process would.
+                print(f'Run failed: {e!r}')
+                state.close()
+                state = PipelineState()
+            stop.wait(max(0, interval - (time.monotonic() - started)))
+    finally:
+        state.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Aggregate, classify and translate cyberattack news.')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Keep running and poll the feeds every --interval seconds.')
+    parser.add_argument('--interval', type=int, default=int(os.environ.get('RSS_INTERVAL', 300)),
+                        help='Seconds between the starts of two runs in daemon mode.')
+    args = parser.parse_args(argv)
+
+    if args.daemon:
+        daemon(args.interval)
+    else:
+        state = PipelineState()
+        try:
+            run(state)
+        finally:
+            state.close()
+    return 0
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from atomic_file import write_atomic
+
+class RunReport:
+    """Timings and counters collected during one rss.py run."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.lock     = threading.Lock()
+        self.started  = time.time()
+        self.stages   = {}
+        self.feeds    = {}
+        self.counters = {}
+        self.items    = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.stages[name] = self.stages.get(name, 0) + time.perf_counter() - start
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def feed(self, label, seconds, entries, error=None):
+        with self.lock:
+            self.feeds[label] = {'seconds': round(seconds, 3), 'entries': entries, 'error': error}
+
+    def feed_items(self, name, new, total):
+        self.items[name] = {'new': new, 'total': total}
+
+    def as_dict(self):
+        fetched = self.counters.get('entries_fetched', 0)
+        dedup   = {name: self.counters.get(name, 0) for name in ('seen', 'ignored_source', 'seen_url', 'near_duplicate')}
+        return {
+            'started': datetime.fromtimestamp(self.started, timezone.utc).isoformat(),
+            'duration': round(time.time() - self.started, 3),
+            'stages': {name: round(seconds, 3) for name, seconds in self.stages.items()},
+            'feeds': self.feeds,
+            'dedup': {
+                'entries': fetched,
+                'hits': dedup,
+                'hit_rate': {name: round(hits / fetched, 4) if fetched else 0 for name, hits in dedup.items()},
+            },
+            'counters': self.counters,
+            'items': self.items,
+        }
+
+    def prometheus(self):
+        data  = self.as_dict()
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f'# HELP cyberwatch_{name} {help_text}')
+            lines.append(f'# TYPE cyberwatch_{name} gauge')
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{escape_label(label)}"' for key, label in labels.items())
+                lines.append(f'cyberwatch_{name}{{{label_text}}} {value}' if label_text else f'cyberwatch_{name} {value}')
+
+        metric('run_seconds', 'Wall time of the last run.', [({}, data['duration'])])
+        metric('run_timestamp_seconds', 'Start time of the last run.', [({}, int(self.started))])
+        metric('stage_seconds', 'Wall time per pipeline stage.',
+               [({'stage': name}, seconds) for name, seconds in data['stages'].items()])
+        metric('feed_fetch_seconds', 'Fetch latency per news feed.',
+               [({'feed': label}, feed['seconds']) for label, feed in data['feeds'].items()])
+        metric('feed_entries', 'Entries returned per news feed.',
+               [({'feed': label}, feed['entries']) for label, feed in data['feeds'].items()])
+        metric('counter', 'Run counters (API calls, tokens, characters, dedup hits).',
+               [({'name': name}, value) for name, value in data['counters'].items()])
+        metric('feed_items', 'Items per output feed.',
+               [({'feed': name, 'kind': kind}, value) for name, counts in data['items'].items() for kind, value in counts.items()])
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path, prometheus_path=None):
+        write_atomic(path, json.dumps(self.as_dict(), ensure_ascii=False, indent=4))
+        if prometheus_path:
+            write_atomic(prometheus_path, self.prometheus())
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
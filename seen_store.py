@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from atomic_file import atomic_writer
+
+# Hashes that have not been seen for this long are dropped when the store is
+# flushed. The news queries only look back 12 hours, so a month is plenty.
+RETENTION_DAYS = 30
+
+class SeenStore:
+    """Set of seen item hashes, loaded once and written back at the end of a run.
+
+    Each line of the file holds a hash and the Unix time it was first seen.
+    Files written by the previous implementation (hash only) are still read;
+    their hashes are dated from the time of loading.
+    """
+
+    def __init__(self, path, retention_days=RETENTION_DAYS):
+        self.path      = path
+        self.retention = retention_days * 86400
+        self.items     = {}
+        self.pending   = {}
+        self.rewrite   = False
+        self.load()
+
+    def load(self):
+        now = int(time.time())
+        try:
+            with open(self.path, 'r') as file:
+                for line in file:
+                    fields = line.split()
+                    if not fields:
+                        continue
+                    if len(fields) > 1:
+                        self.items[fields[0]] = int(fields[1])
+                    else:
+                        self.items[fields[0]] = now
+                        self.rewrite = True
+        except FileNotFoundError:
+            pass
+
+    def __contains__(self, item_hash):
+        return item_hash in self.items
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, item_hash):
+        if item_hash in self.items:
+            return
+        now = int(time.time())
+        self.items[item_hash] = now
+        self.pending[item_hash] = now
+
+    def discard(self, item_hash):
+        # Only hashes added in this run can be taken back.
+        if item_hash in self.pending:
+            del self.pending[item_hash]
+            del self.items[item_hash]
+
+    def compact(self):
+        cutoff  = int(time.time()) - self.retention
+        expired = [item_hash for item_hash, seen in self.items.items() if seen < cutoff]
+        for item_hash in expired:
+            del self.items[item_hash]
+        return len(expired)
+
+    def flush(self):
+        if self.compact() or self.rewrite:
+            with atomic_writer(self.path) as file:
+                for item_hash, seen in self.items.items():
+                    file.write(f'{item_hash} {seen}\n')
+            self.rewrite = False
+        elif self.pending:
+            with open(self.path, 'a') as file:
+                for item_hash, seen in self.pending.items():
+                    file.write(f'{item_hash} {seen}\n')
+        self.pending = {}
+
+def random_hash():
+    return '%032x' % random.getrandbits(128)
+
+def benchmark(sizes, lookups):
+    print(f'{"hashes":>10} {"load (s)":>10} {"lookup (ns)":>12} {"legacy lookup (ns)":>19}')
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path   = os.path.join(directory, f'seen_{size}.txt')
+            hashes = [random_hash() for _ in range(size)]
+            now    = int(time.time())
+            with open(path, 'w') as file:
+                for item_hash in hashes:
+                    file.write(f'{item_hash} {now}\n')
+
+            start = time.perf_counter()
+            store = SeenStore(path)
+            load  = time.perf_counter() - start
+
+            # Half of the probes are hits, half are misses.
+            probes = random.sample(hashes, min(lookups // 2, size))
+            probes += [random_hash() for _ in range(lookups - len(probes))]
+
+            start = time.perf_counter()
+            for item_hash in probes:
+                item_hash in store
+            lookup = (time.perf_counter() - start) / len(probes) * 1e9
+
+            # The previous implementation re-read the whole file for every
+            # lookup, so only a handful of probes are timed.
+            legacy_probes = probes[:20]
+            start = time.perf_counter()
+            for item_hash in legacy_probes:
+                with open(path, 'r') as file:
+                    item_hash in file.read()
+            legacy = (time.perf_counter() - start) / len(legacy_probes) * 1e9
+
+            print(f'{size:>10} {load:>10.2f} {lookup:>12.0f} {legacy:>19.0f}')
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the seen-items store.')
+    parser.add_argument('--sizes', default='10000,100000,1000000,3000000',
+                        help='Comma-separated store sizes to benchmark.')
+    parser.add_argument('--lookups', type=int, default=100000,
+                        help='Number of lookups timed per store size.')
+    args = parser.parse_args()
+    benchmark([int(size) for size in args.sizes.split(',')], args.lookups)
+
+if __name__ == '__main__':
+    main()
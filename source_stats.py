@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+import hashlib
+import json
+
+from atomic_file import write_json
+
+# A source is bypassed once at least MIN_SAMPLE of its entries were
+# classified and at most MAX_LIKELY_RATIO of them were likely.
+MIN_SAMPLE       = 50
+MAX_LIKELY_RATIO = 0.01
+# One entry in RESAMPLE_EVERY of a bypassed source is still classified, so
+# the source can earn its way back.
+RESAMPLE_EVERY   = 10
+# Counts are halved past this many entries, so old history fades out.
+MAX_SAMPLE       = 1000
+
+class SourceStats:
+    """Per-source counts of classified entries and of likely verdicts."""
+
+    def __init__(self, path):
+        self.path    = path
+        self.sources = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                self.sources = json.load(file)
+        except FileNotFoundError:
+            pass
+
+    def likely_ratio(self, source):
+        stats = self.sources.get(source)
+        if not stats or not stats['entries']:
+            return None
+        return stats['likely'] / stats['entries']
+
+    def is_noise(self, source):
+        stats = self.sources.get(source)
+        return (stats is not None and stats['entries'] >= MIN_SAMPLE
+                and stats['likely'] / stats['entries'] <= MAX_LIKELY_RATIO)
+
+    def bypass(self, source, title):
+        """True when the entry should go straight to the unlikely feed."""
+        if not self.is_noise(source):
+            return False
+        # Hashing the title keeps the choice stable if the entry is retried.
+        return int(hashlib.md5(title.encode('utf-8')).hexdigest()[:8], 16) % RESAMPLE_EVERY != 0
+
+    def record(self, source, likely):
+        stats = self.sources.setdefault(source, {'entries': 0, 'likely': 0})
+        stats['entries'] += 1
+        stats['likely']  += int(likely)
+        if stats['entries'] > MAX_SAMPLE:
+            stats['entries'] //= 2
+            stats['likely']  //= 2
+
+    def save(self):
+        write_json(self.path, self.sources, indent=4, sort_keys=True)
@@ -4,10 +4,10 @@ California state-specific breach monitor configuration and processing
 """
 
 import logging
-from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import extract_pdf
+from states.dates import date_range, describe, parse_date
 
 logger = logging.getLogger(__name__)
 
@@ -17,14 +17,17 @@ class CaliforniaConfig:
     STATE_NAME = "California"
     
     @staticmethod
-    def parse_breach_table(html_content):
-        """Parse the California breach notification table"""
+    def parse_breach_table(html_content, start_date=None, end_date=None):
+        """Parse the California breach notification table
+        
+        Keeps the notifications reported from start_date to end_date
+        (inclusive), yesterday's by default.
+        """
         soup = BeautifulSoup(html_content, 'html.parser')
         
-        # Calculate yesterday's date (day before execution) in MM/DD/YYYY format
-        yesterday = datetime.now() - timedelta(days=1)
-        yesterday_str = yesterday.strftime('%m/%d/%Y')
-        logger.info(f"Filtering notifications for date: {yesterday_str}")
+        start_date, end_date = date_range(start_date, end_date)
+        window = describe(start_date, end_date)
+        logger.info(f"Filtering notifications for date: {window}")
         
         # Find the table with the specified class
         table = soup.find('table', class_='views-table cols-3 table table-hover table-striped')
@@ -61,9 +64,10 @@ class CaliforniaConfig:
                 # Extract reported date from third column
                 reported_date_text = reported_date_cell.get_text(strip=True)
                 
-                # Only process notifications from yesterday
-                if reported_date_text != yesterday_str:
-                    logger.debug(f"Skipping notification reported {reported_date_text} (not from yesterday {yesterday_str})")
+                # Only process notifications reported in the date window (MM/DD/YYYY)
+                reported_date = parse_date(reported_date_text, '%m/%d/%Y')
+                if not reported_date or not start_date <= reported_date <= end_date:
+                    logger.debug(f"Skipping notification reported {reported_date_text} (not from {window})")
                     continue
                 
                 # Extract organization name and link from first column
@@ -105,7 +109,7 @@ class CaliforniaConfig:
                 logger.warning(f"Error parsing row: {e}")
                 continue
         
-        logger.info(f"Found {len(breaches)} notifications reported on {yesterday_str}")
+        logger.info(f"Found {len(breaches)} notifications reported on {window}")
         return breaches  # Empty list is valid - means no matching results
     
     @staticmethod
@@ -115,8 +119,7 @@ class CaliforniaConfig:
             logger.info(f"Extracting PDF link from notification page: {notification_url}")
             html_content = fetch_webpage_func(notification_url)
             if not html_content:
-                logger.error(f"Failed to fetch notification page: {notification_url}")
-                return None
+                raise extract_pdf.TransientError(f"Failed to fetch notification page: {notification_url}")
                 
             soup = BeautifulSoup(html_content, 'html.parser')
             
@@ -158,6 +161,8 @@ class CaliforniaConfig:
             logger.info(f"No preferred PDF found, using first available: {selected_pdf['text']}")
             return selected_pdf['url']
             
+        except extract_pdf.TransientError:
+            raise
         except Exception as e:
             logger.error(f"Error extracting PDF link from {notification_url}: {e}")
             return None
@@ -190,6 +195,8 @@ class CaliforniaConfig:
                 logger.info(f"No data extracted from PDF {pdf_url} (likely filtered out)")
                 return None
                 
+        except extract_pdf.TransientError:
+            raise
         except Exception as e:
             logger.error(f"Error processing California breach {link}: {e}")
             return None
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Date window shared by the state parsers
+"""
+
+from datetime import datetime, timedelta
+
+def yesterday():
+    """Day before execution"""
+    return (datetime.now() - timedelta(days=1)).date()
+
+def date_range(start_date=None, end_date=None):
+    """Return the inclusive (start, end) dates of the notifications to keep.
+
+    Without dates, only yesterday's notifications are kept (the daily run).
+    A start date alone keeps everything from that day up to yesterday.
+    """
+    end_date = end_date or yesterday()
+    return start_date or end_date, end_date
+
+def describe(start_date, end_date):
+    if start_date == end_date:
+        return start_date.isoformat()
+    return f"{start_date.isoformat()} to {end_date.isoformat()}"
+
+def parse_date(text, date_format):
+    """Parse a table cell date, or return None when it is not a date"""
+    try:
+        return datetime.strptime(text, date_format).date()
+    except ValueError:
+        return None
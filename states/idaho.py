@@ -4,10 +4,10 @@ Idaho state-specific breach monitor configuration and processing
 """
 
 import logging
-from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import extract_pdf
+from states.dates import date_range, describe, parse_date
 
 logger = logging.getLogger(__name__)
 
@@ -16,14 +16,17 @@ class IdahoConfig:
     STATE_NAME = "Idaho"
     
     @staticmethod
-    def parse_breach_table(html_content):
-        """Parse the Idaho breach notification table"""
+    def parse_breach_table(html_content, start_date=None, end_date=None):
+        """Parse the Idaho breach notification table
+        
+        Keeps the notifications dated from start_date to end_date (inclusive),
+        yesterday's by default.
+        """
         soup = BeautifulSoup(html_content, 'html.parser')
         
-        # Calculate yesterday's date (day before execution) in M/DD/YYYY format (no leading zeros)
-        yesterday = datetime.now() - timedelta(days=1)
-        yesterday_str = f"{yesterday.month}/{yesterday.day}/{yesterday.year}"
-        logger.info(f"Filtering notifications for date: {yesterday_str}")
+        start_date, end_date = date_range(start_date, end_date)
+        window = describe(start_date, end_date)
+        logger.info(f"Filtering notifications for date: {window}")
         
         # Find the table with breach notifications
         table = soup.find('table')
@@ -57,9 +60,10 @@ class IdahoConfig:
                 # Extract date from second column
                 date_text = date_cell.get_text(strip=True)
                 
-                # Only process notifications from yesterday
-                if date_text != yesterday_str:
-                    logger.debug(f"Skipping notification dated {date_text} (not from yesterday {yesterday_str})")
+                # Only process notifications from the date window (M/D/YYYY, no leading zeros)
+                row_date = parse_date(date_text, '%m/%d/%Y')
+                if not row_date or not start_date <= row_date <= end_date:
+                    logger.debug(f"Skipping notification dated {date_text} (not from {window})")
                     continue
                 
                 # Extract organization name and link from first column
@@ -96,7 +100,7 @@ class IdahoConfig:
                 logger.warning(f"Error parsing row: {e}")
                 continue
         
-        logger.info(f"Found {len(breaches)} notifications from {yesterday_str}")
+        logger.info(f"Found {len(breaches)} notifications from {window}")
         return breaches  # Empty list is valid - means no matching results
     
     @staticmethod
@@ -115,6 +119,8 @@ class IdahoConfig:
                 logger.info(f"No data extracted from {link} (likely filtered out)")
                 return None
                 
+        except extract_pdf.TransientError:
+            raise
         except Exception as e:
             logger.error(f"Error processing Idaho breach {link}: {e}")
             return None
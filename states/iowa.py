@@ -4,10 +4,11 @@ Iowa state-specific breach monitor configuration and processing
 """
 
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import extract_pdf
+from states.dates import date_range, describe, parse_date
 
 logger = logging.getLogger(__name__)
 
@@ -18,18 +19,25 @@ class IowaConfig:
     @staticmethod
     def get_current_year_url():
         """Get the current year-specific URL for Iowa breach notifications"""
-        current_year = datetime.now().year
-        return f"https://www.iowaattorneygeneral.gov/for-consumers/security-breach-notifications/{current_year}-security-breach-notification"
+        return IowaConfig.get_year_url(datetime.now().year)
     
     @staticmethod
-    def parse_breach_table(html_content):
-        """Parse the Iowa breach notification table"""
+    def get_year_url(year):
+        """Get the URL of Iowa breach notifications for a given year"""
+        return f"https://www.iowaattorneygeneral.gov/for-consumers/security-breach-notifications/{year}-security-breach-notification"
+    
+    @staticmethod
+    def parse_breach_table(html_content, start_date=None, end_date=None):
+        """Parse the Iowa breach notification table
+        
+        Keeps the notifications dated from start_date to end_date (inclusive),
+        yesterday's by default.
+        """
         soup = BeautifulSoup(html_content, 'html.parser')
         
-        # Calculate yesterday's date (day before execution) in M-DD-YYYY format (no leading zeros)
-        yesterday = datetime.now() - timedelta(days=1)
-        yesterday_str = f"{yesterday.month}-{yesterday.day}-{yesterday.year}"
-        logger.info(f"Filtering notifications for date: {yesterday_str}")
+        start_date, end_date = date_range(start_date, end_date)
+        window = describe(start_date, end_date)
+        logger.info(f"Filtering notifications for date: {window}")
         
         # Find the table (there should be only one)
         table = soup.find('table')
@@ -63,9 +71,10 @@ class IowaConfig:
                 # Extract date from first column
                 date_text = date_cell.get_text(strip=True)
                 
-                # Only process notifications from yesterday
-                if date_text != yesterday_str:
-                    logger.debug(f"Skipping notification dated {date_text} (not from yesterday {yesterday_str})")
+                # Only process notifications from the date window (M-D-YYYY, no leading zeros)
+                row_date = parse_date(date_text, '%m-%d-%Y')
+                if not row_date or not start_date <= row_date <= end_date:
+                    logger.debug(f"Skipping notification dated {date_text} (not from {window})")
                     continue
                 
                 # Extract organization names and links from second column
@@ -107,7 +116,7 @@ class IowaConfig:
                 logger.warning(f"Error parsing row: {e}")
                 continue
         
-        logger.info(f"Found {len(breaches)} notifications from {yesterday_str}")
+        logger.info(f"Found {len(breaches)} notifications from {window}")
         return breaches  # Empty list is valid - means no matching results
     
     @staticmethod
@@ -126,6 +135,8 @@ class IowaConfig:
                 logger.info(f"No data extracted from {link} (likely filtered out)")
                 return None
                 
+        except extract_pdf.TransientError:
+            raise
         except Exception as e:
             logger.error(f"Error processing Iowa breach {link}: {e}")
             return None
@@ -4,11 +4,11 @@ Maine state-specific breach monitor configuration and processing
 """
 
 import logging
-from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 from dateutil import parser as date_parser
 import extract_pdf
+from states.dates import date_range, describe, parse_date
 
 logger = logging.getLogger(__name__)
 
@@ -17,13 +17,17 @@ class MaineConfig:
     STATE_NAME = "Maine"
     
     @staticmethod
-    def parse_breach_table(html_content):
-        """Parse the Maine breach notification table"""
+    def parse_breach_table(html_content, start_date=None, end_date=None):
+        """Parse the Maine breach notification table
+        
+        Keeps the notifications dated from start_date to end_date (inclusive),
+        yesterday's by default.
+        """
         soup = BeautifulSoup(html_content, 'html.parser')
         
-        # Calculate yesterday's date (day before execution)
-        yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-        logger.info(f"Filtering notifications for date: {yesterday}")
+        start_date, end_date = date_range(start_date, end_date)
+        window = describe(start_date, end_date)
+        logger.info(f"Filtering notifications for date: {window}")
         
         # Look for the table with the specified class
         table = soup.find('table', class_='breachTable stripe hover dataTable no-footer')
@@ -55,9 +59,10 @@ class MaineConfig:
                 # Extract date
                 date_text = date_cell.get_text(strip=True)
                 
-                # Only process notifications from yesterday
-                if date_text != yesterday:
-                    logger.debug(f"Skipping notification dated {date_text} (not from yesterday {yesterday})")
+                # Only process notifications from the date window
+                row_date = parse_date(date_text, '%Y-%m-%d')
+                if not row_date or not start_date <= row_date <= end_date:
+                    logger.debug(f"Skipping notification dated {date_text} (not from {window})")
                     continue
                 
                 # Extract organization name and link
@@ -86,7 +91,7 @@ class MaineConfig:
                 logger.warning(f"Error parsing row: {e}")
                 continue
         
-        logger.info(f"Found {len(breaches)} notifications from {yesterday}")
+        logger.info(f"Found {len(breaches)} notifications from {window}")
         return breaches  # Empty list is valid - means no matching results
     
     @staticmethod
@@ -95,7 +100,7 @@ class MaineConfig:
         try:
             html_content = fetch_webpage_func(url)
             if not html_content:
-                return None
+                raise extract_pdf.TransientError(f"Failed to fetch notification page: {url}")
                 
             soup = BeautifulSoup(html_content, 'html.parser')
             
@@ -134,6 +139,8 @@ class MaineConfig:
                 'breach_description': breach_description,
             }
             
+        except extract_pdf.TransientError:
+            raise
         except Exception as e:
             logger.error(f"Error extracting notification details from {url}: {e}")
             return None
@@ -177,6 +184,8 @@ class MaineConfig:
                 logger.info(f"No data extracted from PDF {pdf_url}")
                 return None
                 
+        except extract_pdf.TransientError:
+            raise
         except Exception as e:
             logger.error(f"Error processing Maine breach {link}: {e}")
             return None
@@ -6,9 +6,10 @@ New Hampshire state-specific breach monitor configuration and processing
 import logging
 import json
 import requests
-from datetime import datetime, timedelta
+from datetime import datetime
 from urllib.parse import urljoin
 import extract_pdf
+from states.dates import date_range, describe
 
 logger = logging.getLogger(__name__)
 
@@ -42,13 +43,16 @@ class NewHampshireConfig:
             return None
     
     @staticmethod
-    def parse_json_api(json_content):
-        """Parse the New Hampshire JSON API response"""
+    def parse_json_api(json_content, start_date=None, end_date=None):
+        """Parse the New Hampshire JSON API response
+        
+        Keeps the notifications posted from start_date to end_date
+        (inclusive), yesterday's by default.
+        """
         try:
-            # Calculate yesterday's date (day before execution)
-            yesterday = datetime.now() - timedelta(days=1)
-            yesterday_str = yesterday.strftime('%Y-%m-%d')
-            logger.info(f"Filtering notifications for date: {yesterday_str}")
+            start_date, end_date = date_range(start_date, end_date)
+            window = describe(start_date, end_date)
+            logger.info(f"Filtering notifications for date: {window}")
             
             # Parse JSON
             data = json.loads(json_content)
@@ -89,9 +93,9 @@ class NewHampshireConfig:
                     
                     date_formatted = date_obj.strftime('%Y-%m-%d')
                     
-                    # Only process notifications from yesterday
-                    if date_formatted != yesterday_str:
-                        logger.debug(f"Skipping notification dated {date_formatted} (not from yesterday {yesterday_str})")
+                    # Only process notifications from the date window
+                    if not start_date <= date_obj.date() <= end_date:
+                        logger.debug(f"Skipping notification dated {date_formatted} (not from {window})")
                         continue
                     
                     # Extract PDF URL from field_document_file
@@ -137,7 +141,7 @@ class NewHampshireConfig:
                     logger.warning(f"Error parsing JSON item: {e}")
                     continue
             
-            logger.info(f"Found {len(breaches)} notifications from {yesterday_str}")
+            logger.info(f"Found {len(breaches)} notifications from {window}")
             return breaches  # Empty list is valid - means no matching results
             
         except Exception as e:
@@ -168,6 +172,8 @@ class NewHampshireConfig:
                 logger.info(f"No data extracted from PDF {pdf_url}")
                 return None
                 
+        except extract_pdf.TransientError:
+            raise
         except Exception as e:
             logger.error(f"Error processing New Hampshire breach {item.get('title', 'unknown')}: {e}")
             return None
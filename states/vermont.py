@@ -5,11 +5,12 @@ Vermont state-specific breach monitor configuration and processing
 
 import logging
 import xml.etree.ElementTree as ET
-from datetime import datetime, timedelta
+from datetime import datetime
 from email.utils import parsedate_tz, mktime_tz
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import extract_pdf
+from states.dates import date_range, describe
 
 logger = logging.getLogger(__name__)
 
@@ -19,13 +20,16 @@ class VermontConfig:
     STATE_NAME = "Vermont"
     
     @staticmethod
-    def parse_rss_feed(rss_content):
-        """Parse the Vermont RSS feed"""
+    def parse_rss_feed(rss_content, start_date=None, end_date=None):
+        """Parse the Vermont RSS feed
+        
+        Keeps the items published from start_date to end_date (inclusive),
+        yesterday's by default.
+        """
         try:
-            # Calculate yesterday's date (day before execution)
-            yesterday = datetime.now() - timedelta(days=1)
-            yesterday_str = yesterday.strftime('%Y-%m-%d')
-            logger.info(f"Filtering RSS items for date: {yesterday_str}")
+            start_date, end_date = date_range(start_date, end_date)
+            window = describe(start_date, end_date)
+            logger.info(f"Filtering RSS items for date: {window}")
             
             # Parse XML
             root = ET.fromstring(rss_content)
@@ -54,9 +58,9 @@ class VermontConfig:
                         logger.warning(f"Could not parse pubDate: {pubdate_str}")
                         continue
                     
-                    # Only process items from yesterday
-                    if pubdate_formatted != yesterday_str:
-                        logger.debug(f"Skipping item dated {pubdate_formatted} (not from yesterday {yesterday_str})")
+                    # Only process items from the date window
+                    if not start_date <= pubdate.date() <= end_date:
+                        logger.debug(f"Skipping item dated {pubdate_formatted} (not from {window})")
                         continue
                     
                     breaches.append({
@@ -70,7 +74,7 @@ class VermontConfig:
                     logger.warning(f"Error parsing RSS item: {e}")
                     continue
             
-            logger.info(f"Found {len(breaches)} RSS items from {yesterday_str}")
+            logger.info(f"Found {len(breaches)} RSS items from {window}")
             return breaches  # Empty list is valid - means no matching results
             
         except Exception as e:
@@ -83,7 +87,7 @@ class VermontConfig:
         try:
             html_content = fetch_webpage_func(url)
             if not html_content:
-                return None
+                raise extract_pdf.TransientError(f"Failed to fetch notification page: {url}")
                 
             soup = BeautifulSoup(html_content, 'html.parser')
             
@@ -110,6 +114,8 @@ class VermontConfig:
             
             return full_pdf_url
             
+        except extract_pdf.TransientError:
+            raise
         except Exception as e:
             logger.error(f"Error extracting PDF link from {url}: {e}")
             return None
@@ -142,6 +148,8 @@ class VermontConfig:
                 logger.info(f"No data extracted from PDF {pdf_url}")
                 return None
                 
+        except extract_pdf.TransientError:
+            raise
         except Exception as e:
             logger.error(f"Error processing Vermont breach {item.get('title', 'unknown')}: {e}")
             return None
@@ -4,10 +4,10 @@ Washington state-specific breach monitor configuration and processing
 """
 
 import logging
-from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import extract_pdf
+from states.dates import date_range, describe, parse_date
 
 logger = logging.getLogger(__name__)
 
@@ -16,13 +16,17 @@ class WashingtonConfig:
     STATE_NAME = "Washington"
     
     @staticmethod
-    def parse_breach_table(html_content):
-        """Parse the Washington breach notification table"""
+    def parse_breach_table(html_content, start_date=None, end_date=None):
+        """Parse the Washington breach notification table
+        
+        Keeps the notifications dated from start_date to end_date (inclusive),
+        yesterday's by default.
+        """
         soup = BeautifulSoup(html_content, 'html.parser')
         
-        # Calculate yesterday's date (day before execution) in MM/DD/YYYY format
-        yesterday = (datetime.now() - timedelta(days=1)).strftime('%m/%d/%Y')
-        logger.info(f"Filtering notifications for date: {yesterday}")
+        start_date, end_date = date_range(start_date, end_date)
+        window = describe(start_date, end_date)
+        logger.info(f"Filtering notifications for date: {window}")
         
         # Look for the table with the specified class
         table = soup.find('table', class_='tablesaw tablesaw-stack cols-5')
@@ -54,9 +58,10 @@ class WashingtonConfig:
                 # Extract date
                 date_text = date_cell.get_text(strip=True)
                 
-                # Only process notifications from yesterday
-                if date_text != yesterday:
-                    logger.debug(f"Skipping notification dated {date_text} (not from yesterday {yesterday})")
+                # Only process notifications from the date window (MM/DD/YYYY)
+                row_date = parse_date(date_text, '%m/%d/%Y')
+                if not row_date or not start_date <= row_date <= end_date:
+                    logger.debug(f"Skipping notification dated {date_text} (not from {window})")
                     continue
                 
                 # Extract organization name and link
@@ -80,7 +85,7 @@ class WashingtonConfig:
                 logger.warning(f"Error parsing row: {e}")
                 continue
         
-        logger.info(f"Found {len(breaches)} notifications from {yesterday}")
+        logger.info(f"Found {len(breaches)} notifications from {window}")
         return breaches  # Empty list is valid - means no matching results
     
     @staticmethod
@@ -99,6 +104,8 @@ class WashingtonConfig:
                 logger.info(f"No data extracted from {link} (likely filtered out)")
                 return None
                 
+        except extract_pdf.TransientError:
+            raise
         except Exception as e:
             logger.error(f"Error processing Washington breach {link}: {e}")
             return None
@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+"""
+"Have we seen this URL" checks against cyberattacks.json.
+
+The records are loaded once per process and their notification page URL
+(`url`) and PDF URL (`pdf_url`) are kept, normalized, in a set, so every
+check is a single lookup however many states or scripts ask.
+
+Usage:
+  python url_index.py <url>...   # print whether each URL is already recorded
+"""
+
+import json
+import os
+import sys
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+CYBERATTACKS_JSON_FILE = './cyberattacks.json'
+URL_FIELDS             = ('url', 'pdf_url')
+TRACKING_PARAMS        = {'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', '_ga', '_gl', 'igshid'}
+DEFAULT_PORTS          = {'http': 80, 'https': 443}
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name.startswith('utm_') or name in TRACKING_PARAMS
+
+def normalize_url(url):
+    """Fold the scheme and host case, drop default ports, trailing slashes,
+    fragments and tracking parameters."""
+    parts  = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host   = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+    path   = parts.path.rstrip('/')
+    query  = urlencode([(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                        if not is_tracking_param(name)])
+    return urlunsplit((scheme, host, path, query, ''))
+
+class UrlIndex:
+    """Normalized URLs of a list of records."""
+
+    def __init__(self, records=(), fields=URL_FIELDS):
+        self.fields = fields
+        self.urls   = set()
+        for record in records:
+            self.add(record)
+
+    def add(self, record):
+        if not isinstance(record, dict):
+            return
+        for field in self.fields:
+            if record.get(field):
+                self.urls.add(normalize_url(record[field]))
+
+    def __contains__(self, url):
+        return bool(url) and normalize_url(url) in self.urls
+
+    def __len__(self):
+        return len(self.urls)
+
+_indexes = {}
+_lock    = threading.Lock()
+
+def load_records(path):
+    # A missing file is a first run; a corrupt one raises, so that every
+    # breach does not look new.
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+def cyberattacks_index(path=CYBERATTACKS_JSON_FILE, loader=load_records):
+    """Return the UrlIndex of path, loading the file on first use only."""
+    key = os.path.abspath(path)
+    with _lock:
+        if key not in _indexes:
+            _indexes[key] = UrlIndex(loader(path))
+        return _indexes[key]
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip())
+        return 2
+    index = cyberattacks_index()
+    for url in sys.argv[1:]:
+        print(f"{'seen' if url in index else 'new '} {url}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())